@@ -1,16 +1,13 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 import openpyxl
@@ -18,18 +15,32 @@ from openpyxl.styles import Font, Alignment
 import os
 import requests
 from io import BytesIO
-from config import EMAIL, PASSWORD, TELEGRAM_BOT_TOKEN
+from config import TELEGRAM_BOT_TOKEN
 from whatsapp_driver import WhatsAppManager
-from constants import ACCOUNTS_DIR
+from constants import (ACCOUNTS_DIR, PARSER_XLSX_CHECKPOINT_EVERY, PARSER_FILTERS,
+                       PARSER_SKIP_KNOWN_CANDIDATES, PARSER_DELTA_ONLY, PARSER_MIN_RESUME_INTERVAL,
+                       PARSER_BROWSER_MODE, PARSER_DETAIL_WORKERS, PARSER_MAX_CONCURRENT_JOBS,
+                       RESUME_SELECTORS, WA_PRIORITY_INTERACTIVE, WA_PRIORITY_BULK)
+from candidate_index import CandidateIndex
+from candidate_journal import CandidateJournal
+from parser_checkpoint import ParserCheckpoint
+from page_waits import StepTimer, site_rate_limiter
+from parser_progress import ProgressReporter, stream_progress
+from parser_browser import page_load_time, browser_stats
+from hr_session import HRSessionManager, BASE_URL
+from resume_extractor import wait_resume_rendered, reveal_contacts, extract_resume, RESUME_LINK_JS
+from resume_harvester import ListingHarvester
+from resume_workers import ResumeWorkerPool
 import pickle
 from openpyxl import load_workbook
 import io
 from aiogram.types import FSInputFile, BufferedInputFile
 from urllib.parse import quote
 from openpyxl.drawing.image import Image
-from excel_photo_replacer import replace_photo_urls_with_images
-import shutil
+from excel_photo_replacer import replace_photo_urls_with_images, workbook_to_bytes
 import random
+import threading
+from collections import deque
 
 logging.basicConfig(
     level=logging.INFO,
@@ -43,41 +54,96 @@ dp = Dispatcher()
 class Form(StatesGroup):
     waiting_confirmation = State()
     sending_in_progress = State()
+    waiting_resume_choice = State()
 
 user_data = {}
 
+candidate_index = CandidateIndex()
+
+class ParserCancelled(Exception):
+    pass
+
 class ParserBot:
-    def __init__(self):
+    def __init__(self, session_name="default", cancel_event=None):
+        self.session_name = session_name
+        self.cancel_event = cancel_event or threading.Event()
         self.driver = None
-        self.file_name = "candidates.xlsx"
+        self.workbook = None
+        self.file_name = None
+        self.journal_file = None
+        self.checkpoint = None
+        self.index = candidate_index
+        self.waiter = None
+        self.timer = None
+        self.page_loads = []
+        self.session = None
+        self.journal = None
+        self.collected = 0
+        self.progress = None
         
     
-    async def start_parser(self, chat_id, period):
+    async def start_parser(self, chat_id, period, resume=False):
+        """
+        Выполняет запуск и отправляет собранный файл. Возвращает итог для статуса задания:
+        "done", "cancelled" или "failed" (ошибка при сборе, частичные данные отправлены).
+        Критическая ошибка пробрасывается после сообщения пользователю.
+        """
         try:
-            await bot.send_message(chat_id, "🔄 Парсер запускается... Пожалуйста, подождите.")
-            
-            self.create_empty_excel()
+            # Кандидаты пишутся в журнал контрольной точки, xlsx собирается из него один раз в конце
+            self.checkpoint = ParserCheckpoint(period, PARSER_FILTERS, owner=chat_id)
+            if not resume:
+                self.checkpoint.clear()
+            self.file_name = self.checkpoint.snapshot_file
+            self.journal_file = self.checkpoint.journal_file
             
+            outcome = "failed"
             try:
-                await asyncio.to_thread(self.run_parser, chat_id, period)
+                # Вместо одного сообщения «Парсер запускается...» — редактируемое сообщение с прогрессом
+                self.progress = ProgressReporter(asyncio.get_running_loop())
+                progress_task = asyncio.create_task(stream_progress(bot, chat_id, self.progress))
+                try:
+                    await asyncio.to_thread(self.run_parser, chat_id, period)
+                finally:
+                    self.progress.publish(phase="done")
+                    self.progress.close()
+                    try:
+                        await progress_task
+                    except Exception as e:
+                        # Сбой сообщения о прогрессе не влияет на результат сбора
+                        logger.warning("Не удалось показать прогресс парсера: %s", e)
+                outcome = "done"
                 await bot.send_message(chat_id, "✅ Парсинг успешно завершен")
+            except ParserCancelled:
+                outcome = "cancelled"
+                await bot.send_message(chat_id, "⏹ Парсинг отменён. Отправляю собранные данные, "
+                                                "запуск можно продолжить, снова выбрав этот период.")
             except Exception as e:
-                await bot.send_message(chat_id, f"⚠️ Парсинг завершен с ошибками, но некоторые данные собраны\nОшибка: {str(e)}")
+                await bot.send_message(chat_id, f"⚠️ Парсинг завершен с ошибками, но некоторые данные собраны\nОшибка: {str(e)}\n"
+                                                f"Запуск можно продолжить с места остановки, снова выбрав этот период.")
             
-            shutil.copyfile(self.file_name, "input.xlsx")
-            replace_photo_urls_with_images()
-            shutil.copyfile("output.xlsx", self.file_name)
-            with open(self.file_name, 'rb') as file:
-                await bot.send_document(
-                    chat_id=chat_id,
-                    document=types.FSInputFile(self.file_name),
-                )
+            records = CandidateJournal.read(self.journal_file)
+            known_count = sum(1 for record in records if record.get("known"))
+            if PARSER_DELTA_ONLY:
+                await bot.send_message(chat_id, f"Новых кандидатов: {len(records) - known_count}, "
+                                                f"пропущено уже известных: {known_count}")
+                records = [record for record in records if not record.get("known")]
+            self.workbook = self.build_workbook(records)
+            workbook = await asyncio.to_thread(replace_photo_urls_with_images, self.workbook)
+            document = await asyncio.to_thread(workbook_to_bytes, workbook)
+            await bot.send_document(
+                chat_id=chat_id,
+                document=BufferedInputFile(document, filename="candidates.xlsx"),
+            )
             
-            os.remove(self.file_name)
+            # Кандидаты становятся «известными» только после доставки файла
+            self.index.add_many(CandidateJournal.read(self.journal_file))
+            if outcome == "done":
+                self.checkpoint.clear()
+            return outcome
 
         except Exception as e:
             await bot.send_message(chat_id, f"❌ Критическая ошибка: {str(e)}")
-            logger.error(f"Error in parser: {str(e)}", exc_info=True)
+            raise
 
     def create_empty_excel(self):
         workbook = openpyxl.Workbook()
@@ -91,158 +157,76 @@ class ParserBot:
         sheet.column_dimensions['B'].width = 20
         sheet.column_dimensions['C'].width = 50
         
-        workbook.save(self.file_name)
+        return workbook
+
+    def build_workbook(self, records):
+        workbook = self.create_empty_excel()
+        sheet = workbook.active
+        for record in records:
+            sheet.append([record["full_name"], record["phone"], record["photo_url"]])
+        return workbook
 
     def run_parser(self, chat_id, period):
-        options = webdriver.FirefoxOptions()
-        options.set_preference("dom.webdriver.enabled", False)
-        options.set_preference("useAutomationExtension", False)
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        # options.add_argument('--headless')
-
-        self.driver = webdriver.Firefox(options=options)
-        self.driver.set_window_size(1920, 1080)
-        self.driver.get("https://hr-mnenie.com/")
-        wait = WebDriverWait(self.driver, 10)
-        time.sleep(2)
-        
-        try:
-            cookie_btn = self.driver.find_element(By.XPATH, "//button[contains(., 'Нет, спасибо') or contains(., 'Accept')]")
-            cookie_btn.click()
-            time.sleep(1)
-        except:
-            pass
-        
-        login_attempts = 0
-        while login_attempts < 3:
-            try:
-                login_btn = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Войти')]"))
-                )
-                ActionChains(self.driver).move_to_element(login_btn).pause(0.5).click().perform()
-                self.driver.execute_script("arguments[0].click();", login_btn)
-                login_btn.send_keys(Keys.RETURN)
-                time.sleep(2)
-                break
-            except:
-                login_attempts += 1
-                self.driver.refresh()
-                time.sleep(3)
-        
-        modal_loaded = False
-        start_time = time.time()
-        while time.time() - start_time < 15 and not modal_loaded:
-            modal_loaded = self.driver.execute_script("""
-                return !!document.querySelector('div.popup-center') && 
-                    window.getComputedStyle(document.querySelector('div.popup-center')).display !== 'none';
-            """)
-            time.sleep(0.5)
-        
-        password_link = WebDriverWait(self.driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, 
-                "//a[contains(@class, 'popup-forget') and contains(., 'Войти с паролем')]"))
-        )
-        password_link.click()
-        time.sleep(1)
-        
-        if not modal_loaded:
-            raise Exception("Модальное окно не загрузилось")
-        
-        email_input = self.driver.execute_script("""
-            var inputs = document.querySelectorAll('input.popup-elem__input');
-            for (var i = 0; i < inputs.length; i++) {
-                var style = window.getComputedStyle(inputs[i]);
-                if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                    inputs[i].focus();
-                    return inputs[i];
-                }
-            }
-            return null;
-        """)
-        
-        if not email_input:
-            raise Exception("Не удалось найти видимое поле ввода")
-        
-        for attempt in range(3):
+        session = self.session = HRSessionManager.get_session(self.session_name)
+        self.timer = StepTimer(logger)
+        self.page_loads = []
+        # Сессия занята одним запуском, браузер остаётся тёплым для следующего
+        with session.lock:
             try:
-                email_input.clear()
-                for char in EMAIL:
-                    email_input.send_keys(char)
-                    time.sleep(0.1)
-                    current_value = email_input.get_attribute('value')
-                    if not current_value.endswith(char):
-                        email_input.send_keys(char)
-                
-                if email_input.get_attribute('value') == EMAIL:
-                    break
-            except:
-                if attempt == 2:
-                    raise Exception("Не удалось ввести email")
-                time.sleep(1)
-
-        password_input = self.driver.execute_script("""
-            var inputs = document.querySelectorAll('input.popup-elem__input[type="password"]');
-            for (var i = 0; i < inputs.length; i++) {
-                var style = window.getComputedStyle(inputs[i]);
-                if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                    inputs[i].focus();
-                    return inputs[i];
-                }
-            }
-            return null;
-        """)
-
-        if not password_input:
-            raise Exception("Не удалось найти видимое поле ввода пароля")
-
-        try:
-            password_input.clear()
-            time.sleep(0.5)
-            for char in PASSWORD:
-                password_input.send_keys(char)
-                time.sleep(0.1)
-            time.sleep(1)
-        except Exception as e:
-            raise Exception(f"Не удалось ввести пароль: {str(e)}")
-        
-        password_input.send_keys(Keys.RETURN)
-        time.sleep(1)
-
-        personal_cabinet = WebDriverWait(self.driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[@href='/profile' and contains(@class, 'header__btn')]"))
-        )
+                with self.timer.step("session"):
+                    self.driver = session.get_driver()
+                self.waiter = session.waiter
+                self.progress.publish(phase="filters")
+                with self.timer.step("filters"):
+                    self.apply_filters(period)
+                self.progress.publish(phase="collect")
+                self.collect_candidates()
+            finally:
+                logger.info("Время по шагам парсера:\n%s", self.timer.summary())
+                if self.page_loads:
+                    stats = browser_stats(self.driver)
+                    logger.info(
+                        "Браузер (%s): RSS %.0f МБ, процессов %d, CPU %.1f сек; загрузка анкеты: "
+                        "в среднем %.2f сек, максимум %.2f сек",
+                        PARSER_BROWSER_MODE, stats["rss_bytes"] / 1024 / 1024, stats["processes"], stats["cpu_seconds"],
+                        sum(self.page_loads) / len(self.page_loads), max(self.page_loads))
+                session.release()
+
+    def apply_filters(self, period):
+        # Тёплая сессия может стоять на любой странице — начинаем с главной
+        if self.driver.current_url.rstrip("/") != BASE_URL.rstrip("/"):
+            self.driver.get(BASE_URL)
+        personal_cabinet = self.waiter.element(
+            (By.XPATH, "//a[@href='/profile' and contains(@class, 'header__btn')]"), clickable=True, timeout=10)
         personal_cabinet.click()
-        time.sleep(5)
         
-        candidat_btn = self.driver.find_element(By.CSS_SELECTOR, ".side-bar__wrap img.side-bar__img[alt='UsersFour']")
+        candidat_btn = self.waiter.element(
+            (By.CSS_SELECTOR, ".side-bar__wrap img.side-bar__img[alt='UsersFour']"), clickable=True)
+        tabs = self.driver.window_handles
         candidat_btn.click()
-        time.sleep(5)
+        candidates_tab = self.waiter.new_window(tabs)
         
-        tabs = self.driver.window_handles
-        self.driver.switch_to.window(tabs[1])
-        self.driver.switch_to.window(tabs[0])
         self.driver.close()
-        self.driver.switch_to.window(tabs[1])
-        time.sleep(1)
+        self.driver.switch_to.window(candidates_tab)
         
-        more_candidat = WebDriverWait(self.driver, 15).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "a.big-filter"))
-        )
+        more_candidat = self.waiter.element((By.CSS_SELECTOR, "a.big-filter"), clickable=True)
         self.driver.execute_script("arguments[0].click();", more_candidat)
 
         try:
-            age_inputs = WebDriverWait(self.driver, 15).until(
+            age_inputs = self.waiter.until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".search-filter__input.age input")))
             
             for i, input_field in enumerate(age_inputs):
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", input_field)
                 input_field.clear()
-                input_field.send_keys("18" if i == 0 else "25")
+                input_field.send_keys(str(PARSER_FILTERS["age_from"] if i == 0 else PARSER_FILTERS["age_to"]))
             
-            self.safe_click("//div[contains(@class, 'search-filter__checkbox')]//p[contains(text(), 'Указан возраст')]/..", 
-                        by=By.XPATH)
-            self.safe_click("//div[contains(@class, 'search-filter__checkbox')]//p[contains(text(), 'Женский')]/..", 
-                        by=By.XPATH)
+            if PARSER_FILTERS.get("age_specified"):
+                self.safe_click("//div[contains(@class, 'search-filter__checkbox')]//p[contains(text(), 'Указан возраст')]/..", 
+                            by=By.XPATH)
+            if PARSER_FILTERS.get("gender"):
+                self.safe_click(f"//div[contains(@class, 'search-filter__checkbox')]//p[contains(text(), '{PARSER_FILTERS['gender']}')]/..", 
+                            by=By.XPATH)
             if period == "month":
                 self.safe_click("//div[contains(@class, 'search-filter__checkbox')]//p[contains(text(), 'За месяц')]/..", 
                             by=By.XPATH)
@@ -254,97 +238,343 @@ class ParserBot:
                             by=By.XPATH)
             
             self.safe_click("button.search-filter__btn-submit")
-            time.sleep(5)
+            self.waiter.network_idle()
 
         except Exception as e:
             logger.error(f"Ошибка при настройке фильтров: {str(e)}", exc_info=True)
             raise
-        
+
+    def collect_candidates(self):
+        self.journal = CandidateJournal(self.journal_file)
+        self.collected = 0
+        workers = None
         try:
-            workbook = openpyxl.load_workbook(self.file_name)
-            sheet = workbook.active
+            # Продолжение прерванного запуска: собранные страницы выдачи берутся из контрольной точки,
+            # уже собранные анкеты пропускаются по ссылке
+            seen = self.checkpoint.seen_resumes()
+            if seen:
+                logger.info(f"Продолжение запуска, уже собрано анкет: {len(seen)}")
+
+            if PARSER_DETAIL_WORKERS > 1:
+                with self.timer.step("start_workers"):
+                    workers = ResumeWorkerPool(self.session, PARSER_DETAIL_WORKERS)
+
+            # 1. Сбор ссылок со страниц выдачи. Исполнители открывают анкеты, пока листается выдача
+            harvester = ListingHarvester(self.driver, self.checkpoint, self.open_next_page, self.timer)
+            queued = set()
+            pending = deque()
+            for page_urls in harvester.pages():
+                self.check_cancelled()
+                self.progress.publish(page=harvester.page)
+                for resume_url in page_urls:
+                    if resume_url in queued or resume_url in seen:
+                        continue
+                    queued.add(resume_url)
+                    # Известные анкеты встают в ту же очередь, чтобы журнал сохранял порядок выдачи
+                    known = self.known_candidate(resume_url)
+                    if known:
+                        pending.append((resume_url, None, known))
+                        continue
+                    self.progress.increment("discovered")
+                    pending.append((resume_url, workers.submit(resume_url) if workers else None, None))
+                if workers:
+                    self.save_finished(pending, seen, wait=False)
+
+            # Если у заголовков нет ссылок, оставшиеся страницы обрабатываются переходом по заголовкам
+            if harvester.links_missing:
+                # Продолжение прерванного запуска: переходим на страницу, на которой он остановился,
+                # уже собранные анкеты пропускаются по ссылке
+                page = harvester.page
+                resume_page = self.checkpoint.load().get("page", 1)
+                with self.timer.step("skip_to_page"):
+                    while page < resume_page and self.open_next_page():
+                        page += 1
+                if page > harvester.page:
+                    logger.info(f"Продолжение перехода по заголовкам со страницы {page}")
+                self.checkpoint.save_page(page)
+                self.progress.publish(page=page)
+                while True:
+                    self.check_cancelled()
+                    self.collect_page_sequential(seen)
+                    with self.timer.step("next_page"):
+                        has_next_page = self.open_next_page()
+                    if not has_next_page:
+                        break
+                    page += 1
+                    self.checkpoint.save_page(page)
+                    self.progress.publish(page=page)
+
+            # 2. Анкеты по прямым ссылкам
+            if workers:
+                self.save_finished(pending, seen, wait=True)
+            else:
+                for resume_url, _, known in pending:
+                    self.check_cancelled()
+                    if known:
+                        self.save_known(known, resume_url, seen)
+                    else:
+                        self.collect_resume_direct(resume_url, seen)
             
-            while True:
-                resume_titles = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'resume-data__title')]")
-                for title in resume_titles:
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", title)
-                    time.sleep(1)
+        finally:
+            if workers:
+                workers.close()
+            self.journal.close()
+
+    def save_finished(self, pending, seen, wait):
+        """
+        Сохраняет результаты исполнителей и известные анкеты в порядке выдачи: только готовые
+        с начала очереди или (wait=True) все, дожидаясь завершения.
+        """
+        while pending and (wait or pending[0][1] is None or pending[0][1].done()):
+            self.check_cancelled()
+            resume_url, future, known = pending.popleft()
+            if known:
+                self.save_known(known, resume_url, seen)
+                continue
+            try:
+                resume = future.result()
+            except Exception as e:
+                logger.error(f"Ошибка при обработке анкеты {resume_url}: {e}")
+                continue
+            self.page_loads.append(resume.pop("load_time"))
+            self.save_candidate(resume, resume_url, seen)
 
+    def collect_resume_direct(self, resume_url, seen):
+        try:
+            with self.timer.step("open_resume"):
+                self.waiter.polite("resume", PARSER_MIN_RESUME_INTERVAL)
+                site_rate_limiter.acquire()
+                self.driver.get(resume_url)
+            with self.timer.step("show_contacts"):
+                if not wait_resume_rendered(self.waiter):
+                    logger.warning("Анкета не отрисовалась: %s", resume_url)
+                self.page_loads.append(page_load_time(self.driver))
+                if not reveal_contacts(self.driver, self.waiter):
+                    logger.info("Кнопка 'Показать контакты' не найдена")
+            with self.timer.step("extract"):
+                resume = extract_resume(self.driver)
+            self.save_candidate(resume, resume_url, seen)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке анкеты {resume_url}: {e}", exc_info=True)
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise ParserCancelled()
+
+    def known_candidate(self, resume_url):
+        """
+        Запись из индекса для анкеты, которая уже отправлялась ранее, иначе None.
+        """
+        if PARSER_SKIP_KNOWN_CANDIDATES:
+            known = self.index.get(resume_url)
+            if known:
+                return {**known, "known": True}
+        return None
+
+    def save_known(self, known, resume_url, seen):
+        self.journal.append(known)
+        seen.add(resume_url)
+        self.progress.increment("skipped")
+
+    def skip_known(self, resume_url, seen):
+        if resume_url in seen:
+            return True
+        known = self.known_candidate(resume_url)
+        if known:
+            # Анкета уже отправлялась ранее — берём данные из индекса без открытия вкладки
+            self.save_known(known, resume_url, seen)
+            return True
+        return False
+
+    def save_candidate(self, resume, resume_url, seen):
+        self.journal.append({
+            **resume,
+            "resume_url": resume_url,
+            "known": PARSER_SKIP_KNOWN_CANDIDATES and self.index.is_known_phone(resume["phone"]),
+        })
+        seen.add(resume_url)
+        self.collected += 1
+        self.progress.increment("processed")
+        if PARSER_XLSX_CHECKPOINT_EVERY and self.collected % PARSER_XLSX_CHECKPOINT_EVERY == 0:
+            self.build_workbook(CandidateJournal.read(self.journal_file)).save(self.file_name)
+
+    def collect_page_sequential(self, seen):
+        resume_titles = self.driver.find_elements(By.XPATH, RESUME_SELECTORS["listing_title_xpath"])
+        for title in resume_titles:
+            self.check_cancelled()
+            resume_url = self.driver.execute_script(RESUME_LINK_JS, title)
+            if self.skip_known(resume_url, seen):
+                continue
+            self.progress.increment("discovered")
+            listing_tab = self.driver.current_window_handle
+            tabs = self.driver.window_handles
+            try:
+                with self.timer.step("open_resume"):
+                    self.waiter.polite("resume", PARSER_MIN_RESUME_INTERVAL)
+                    site_rate_limiter.acquire()
+                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", title)
                     actions = ActionChains(self.driver)
                     actions.move_to_element(title).click().perform()
+                    resume_tab = self.waiter.new_window(tabs, timeout=10)
+            except TimeoutException:
+                logger.error("Анкета не открылась в новой вкладке: %s", resume_url)
+                continue
+            self.driver.switch_to.window(resume_tab)
 
-                    time.sleep(2)
-                    tabs = self.driver.window_handles
-                    self.driver.switch_to.window(tabs[-1])
-
-                    try:
-                        try:
-                            show_contacts_btn = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, "//a[contains(@class, 'result-item-main-info__btn') and contains(text(), 'Показать контакты')]"))
-                            )
-                            show_contacts_btn.click()
-                            time.sleep(2)
-                        except TimeoutException:
-                            logger.info("Кнопка 'Показать контакты' не найдена")
-                        
-                        full_name = "не указано"
-                        phone_number = "не указано"
-                        photo_url = "не указано"
-                        
-                        try:
-                            full_name = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.XPATH, "//h3[contains(@class, 'result-item-head__title')]"))
-                            ).text.strip()
-                        except TimeoutException:
-                            pass
-                        
-                        try:
-                            phone_element = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'result-item-main-contact__link') and contains(@href, 'tel:')]"))
-                            )
-                            phone_number = phone_element.text.strip()
-                        except TimeoutException:
-                            pass
-                        
-                        try:
-                            photo_element = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'result-item-main-image')]//img"))
-                            )
-                            photo_url = photo_element.get_attribute("src").strip()
-                            if not photo_url.startswith("http"):
-                                photo_url = "https://hr-mnenie.com" + photo_url
-                        except TimeoutException:
-                            pass
-                        sheet.append([full_name, phone_number, photo_url])
-                        workbook.save(self.file_name)
-                    except Exception as e:
-                        logger.error(f"Ошибка при обработке анкеты: {e}", exc_info=True)
-                    finally:
-                        self.driver.close()
-                        self.driver.switch_to.window(tabs[0])
-                        time.sleep(10)
+            try:
+                resume_url = resume_url or self.driver.current_url
+                if resume_url in seen:
+                    continue
+
+                with self.timer.step("show_contacts"):
+                    if not wait_resume_rendered(self.waiter):
+                        logger.warning("Анкета не отрисовалась: %s", resume_url)
+                    self.page_loads.append(page_load_time(self.driver))
+                    if not reveal_contacts(self.driver, self.waiter):
+                        logger.info("Кнопка 'Показать контакты' не найдена")
                 
-                try:
-                    next_page_btn = self.driver.find_element(By.XPATH, "//a[contains(@class, 'result-page__btn_next')]")
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_page_btn)
-                    time.sleep(1)
-                    next_page_btn.click()
-                    time.sleep(5)
-                except NoSuchElementException:
-                    break
-            
-        finally:
-            self.driver.quit()
+                with self.timer.step("extract"):
+                    resume = extract_resume(self.driver)
+                self.save_candidate(resume, resume_url, seen)
+            except Exception as e:
+                logger.error(f"Ошибка при обработке анкеты: {e}", exc_info=True)
+            finally:
+                self.driver.close()
+                self.driver.switch_to.window(listing_tab)
+
+    def open_next_page(self):
+        try:
+            next_page_btn = self.driver.find_element(By.XPATH, "//a[contains(@class, 'result-page__btn_next')]")
+        except NoSuchElementException:
+            return False
+        first_title = self.driver.find_elements(By.XPATH, RESUME_SELECTORS["listing_title_xpath"])
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_page_btn)
+        self.waiter.polite()
+        site_rate_limiter.acquire()
+        next_page_btn.click()
+        if first_title:
+            try:
+                self.waiter.staleness(first_title[0])
+            except TimeoutException:
+                logger.warning("Список анкет не обновился после перехода на следующую страницу")
+        self.waiter.network_idle()
+        return True
 
     def safe_click(self, selector, by=By.CSS_SELECTOR, timeout=15):
-        element = WebDriverWait(self.driver, timeout).until(
-            EC.presence_of_element_located((by, selector)))
+        element = self.waiter.element((by, selector), timeout=timeout)
         self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'center'});", element)
-        time.sleep(1)
+        self.waiter.polite()
         self.driver.execute_script("arguments[0].click();", element)
         return element
 
-parser = ParserBot()
+class ParserJob:
+    STATUS_TITLES = {
+        "queued": "⏳ в очереди",
+        "running": "🔄 выполняется",
+        "done": "✅ завершён",
+        "failed": "❌ ошибка",
+        "cancelled": "⏹ отменён",
+    }
+
+    def __init__(self, job_id, chat_id, period, period_title, resume):
+        self.id = job_id
+        self.chat_id = chat_id
+        self.period = period
+        self.period_title = period_title
+        self.resume = resume
+        self.status = "queued"
+        self.cancel_event = threading.Event()
+        self.parser = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Рабочая папка задания — папка его контрольной точки (своя у каждого чата)
+        self.workdir = ParserCheckpoint(period, PARSER_FILTERS, owner=chat_id).run_dir
+
+    def describe(self):
+        text = f"#{self.id} {self.period_title}: {self.STATUS_TITLES[self.status]}"
+        if self.parser and self.parser.progress and self.status == "running":
+            progress = self.parser.progress.snapshot()
+            text += (f", страница {progress['page']}, собрано анкет: {progress['processed']}, "
+                     f"{progress['rate_per_minute']:.1f} анкет/мин")
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            text += f", {int(elapsed // 60)} мин {int(elapsed % 60)} сек"
+        return text
+
+class ParserScheduler:
+    """
+    Очередь запусков парсера. Каждое задание выполняется в своём браузере
+    (сессия исполнителя), одновременно не больше max_jobs заданий;
+    бот при этом продолжает обрабатывать другие сообщения.
+    """
+
+    def __init__(self, max_jobs=PARSER_MAX_CONCURRENT_JOBS):
+        self.max_jobs = max_jobs
+        self.queue = asyncio.Queue()
+        self.jobs = {}
+        self._next_id = 1
+        self._workers = []
+
+    def start(self):
+        for slot in range(self.max_jobs):
+            self._workers.append(asyncio.create_task(self._worker(slot)))
+
+    async def stop(self):
+        for job in self.jobs.values():
+            job.cancel_event.set()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def active_job(self, period, chat_id):
+        """
+        Задание чата в очереди или в работе с той же контрольной точкой (период и фильтры).
+        """
+        workdir = ParserCheckpoint(period, PARSER_FILTERS, owner=chat_id).run_dir
+        for job in self.jobs.values():
+            if job.workdir == workdir and job.status in ("queued", "running"):
+                return job
+        return None
+
+    def submit(self, chat_id, period, period_title, resume=False):
+        job = ParserJob(self._next_id, chat_id, period, period_title, resume)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        return job
+
+    def cancel(self, job_id, chat_id):
+        job = self.jobs.get(job_id)
+        if not job or job.chat_id != chat_id:
+            return None
+        if job.status in ("queued", "running"):
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+        return job
+
+    def user_jobs(self, chat_id, limit=10):
+        return [job for job in self.jobs.values() if job.chat_id == chat_id][-limit:]
+
+    async def _worker(self, slot):
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.cancel_event.is_set():
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+                job.parser = ParserBot(session_name=f"worker-{slot}", cancel_event=job.cancel_event)
+                job.status = await job.parser.start_parser(job.chat_id, job.period, resume=job.resume)
+            except Exception as e:
+                job.status = "failed"
+                logger.error(f"Ошибка в задании парсера #{job.id}: {e}", exc_info=True)
+            finally:
+                job.finished_at = time.time()
+                self.queue.task_done()
+
+scheduler = ParserScheduler()
 
 def get_whatsapp_keyboard():
     return ReplyKeyboardMarkup(
@@ -365,8 +595,7 @@ def get_whatsapp_keyboard():
 async def wa_login_command(message: types.Message):
     account = "default"
     try:
-        session = WhatsAppManager.get_session(account)
-        result = await asyncio.to_thread(session.open_browser_and_login)
+        result = await WhatsAppManager.run(account, WA_PRIORITY_INTERACTIVE, "open_browser_and_login")
         
         if "qr_code" in result:
             if len(result['qr_code']) < 1000:
@@ -398,8 +627,7 @@ async def wa_send_command(message: types.Message):
     account = "default"
     
     try:
-        session = WhatsAppManager.get_session(account)
-        result = await asyncio.to_thread(session.send_message, target, msg_text)
+        result = await WhatsAppManager.run(account, WA_PRIORITY_INTERACTIVE, "send_message", target, msg_text)
         
         if "error" in result.get("status", ""):
             await message.answer(f"Ошибка: {result['message']}")
@@ -414,8 +642,7 @@ async def wa_send_command(message: types.Message):
 async def wa_updates_command(message: types.Message):
     account = "default"
     try:
-        session = WhatsAppManager.get_session(account)
-        new_msgs = await asyncio.to_thread(session.get_new_messages_unread)
+        new_msgs = await WhatsAppManager.run(account, WA_PRIORITY_BULK, "get_new_messages_unread")
         
         if not new_msgs:
             await message.answer("Нет новых сообщений")
@@ -548,13 +775,6 @@ async def confirm_sending(message: types.Message, state: FSMContext):
     await message.answer("⏳ Начинаю рассылку...", reply_markup=types.ReplyKeyboardRemove())
     await state.set_state(Form.sending_in_progress)
 
-    try:
-        session = WhatsAppManager.get_session("default")
-    except Exception as e:
-        await message.answer(f"Ошибка WhatsApp: {str(e)}", reply_markup=get_whatsapp_keyboard())
-        await state.clear()
-        return
-
     phones = data['phones']
     messages = data['messages']
     delays = data['delays']
@@ -567,7 +787,9 @@ async def confirm_sending(message: types.Message, state: FSMContext):
                 continue
                 
             # Отправляем сообщение
-            result = await asyncio.to_thread(session.send_message, phone, message_text)
+            # Рассылка идёт с низким приоритетом, чтобы не задерживать отправки из /wa_send и API;
+            # сессия берётся на каждое сообщение, так что после /wa_close рассылка продолжится в новой
+            result = await WhatsAppManager.run("default", WA_PRIORITY_BULK, "send_message", phone, message_text)
             
             if result.get("status") == "success":
                 data['success_count'] += 1
@@ -636,7 +858,7 @@ async def send_welcome(message: types.Message):
     )
 
 @dp.message(F.text.in_(["За месяц", "За неделю", "За сутки"]))
-async def process_period(message: types.Message):
+async def process_period(message: types.Message, state: FSMContext):
     period_map = {
         "За месяц": "month",
         "За неделю": "week",
@@ -644,16 +866,97 @@ async def process_period(message: types.Message):
     }
     period = period_map.get(message.text)
     if period:
-        await message.answer(
-            f"Выбран период: {message.text}. Запускаю парсер...",
-            reply_markup=types.ReplyKeyboardRemove()
-        )
-        await parser.start_parser(message.from_user.id, period)
+        active = scheduler.active_job(period, message.from_user.id)
+        if active:
+            await message.answer(f"Парсер за этот период уже запущен: {active.describe()}\n"
+                                 f"Отменить: /cancel {active.id}")
+            return
+        checkpoint = ParserCheckpoint(period, PARSER_FILTERS, owner=message.from_user.id)
+        if checkpoint.exists():
+            summary = checkpoint.summary()
+            await state.update_data({'period': period, 'period_title': message.text})
+            await state.set_state(Form.waiting_resume_choice)
+            await message.answer(
+                f"Найден незавершённый запуск за период «{message.text}»: "
+                f"страница {summary['page']}, собрано анкет: {summary['collected']}.\n"
+                f"Продолжить с места остановки?",
+                reply_markup=ReplyKeyboardMarkup(
+                    keyboard=[
+                        [KeyboardButton(text="▶️ Продолжить прошлый запуск")],
+                        [KeyboardButton(text="🔄 Начать заново")]
+                    ],
+                    resize_keyboard=True
+                )
+            )
+            return
+        await submit_parser_job(message, period, message.text)
+
+@dp.message(F.text.in_(["▶️ Продолжить прошлый запуск", "🔄 Начать заново"]), Form.waiting_resume_choice)
+async def process_resume_choice(message: types.Message, state: FSMContext):
+    data = await state.get_data()
+    await state.clear()
+    resume = message.text == "▶️ Продолжить прошлый запуск"
+    await submit_parser_job(message, data['period'], data['period_title'], resume=resume)
+
+async def submit_parser_job(message: types.Message, period, period_title, resume=False):
+    """
+    Ставит запуск парсера в очередь и сразу отвечает пользователю,
+    не дожидаясь окончания сбора.
+    """
+    # Между выбором периода и ответом «продолжить/начать заново» мог быть запущен такой же парсер
+    active = scheduler.active_job(period, message.from_user.id)
+    if active:
+        await message.answer(f"Парсер за этот период уже запущен: {active.describe()}\n"
+                             f"Отменить: /cancel {active.id}",
+                             reply_markup=types.ReplyKeyboardRemove())
+        return
+    job = scheduler.submit(message.from_user.id, period, period_title, resume=resume)
+    position = scheduler.queue.qsize()
+    await message.answer(
+        f"{'Продолжение' if resume else 'Запуск'} парсера за период «{period_title}» "
+        f"поставлен в очередь (задание #{job.id}"
+        f"{f', заданий впереди: {position - 1}' if position > 1 else ''}).\n"
+        f"Статус: /jobs, отмена: /cancel {job.id}",
+        reply_markup=types.ReplyKeyboardRemove()
+    )
+
+@dp.message(Command("jobs"))
+async def jobs_command(message: types.Message):
+    jobs = scheduler.user_jobs(message.from_user.id)
+    if not jobs:
+        await message.answer("Заданий парсера нет")
+        return
+    await message.answer("Задания парсера:\n" + "\n".join(job.describe() for job in jobs))
+
+@dp.message(Command("cancel"))
+async def cancel_job_command(message: types.Message, command: CommandObject):
+    if not command.args or not command.args.strip().lstrip("#").isdigit():
+        await message.answer("Укажите номер задания: /cancel <номер>")
+        return
+    job = scheduler.cancel(int(command.args.strip().lstrip("#")), message.from_user.id)
+    if not job:
+        await message.answer("Задание не найдено")
+    elif job.status == "running":
+        await message.answer(f"Останавливаю задание #{job.id}, собранные данные будут отправлены")
+    else:
+        await message.answer(job.describe())
 
 async def main():
     os.makedirs(ACCOUNTS_DIR, exist_ok=True)
-    
-    await dp.start_polling(bot)
+    scheduler.start()
+    # Chrome для WhatsApp запускается в фоне, чтобы «Авторизация WhatsApp» не ждала старта браузера
+    prewarm_task = asyncio.create_task(asyncio.to_thread(WhatsAppManager.prewarm))
+
+    try:
+        await dp.start_polling(bot)
+    finally:
+        # Запуск браузеров в потоке не прерывается; ожидание снимается, результат или ошибка — в лог
+        prewarm_task.cancel()
+        prewarm_result = (await asyncio.gather(prewarm_task, return_exceptions=True))[0]
+        if isinstance(prewarm_result, Exception):
+            logger.error(f"Ошибка предварительного запуска Chrome: {prewarm_result}")
+        await scheduler.stop()
+        await asyncio.to_thread(HRSessionManager.close_all)
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Сравнение сохранения результатов парсера: xlsx после каждого кандидата
+против журнала JSON Lines с одной сборкой xlsx в конце.
+
+Запуск из корня проекта:
+    python benchmarks/bench_candidate_journal.py --rows 1000 10000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candidate_journal import CandidateJournal
+
+
+def synthetic_records(count: int) -> list:
+    return [
+        {
+            "full_name": f"Кандидат Тестовый {i}",
+            "phone": f"+7 (900) {i // 10000 % 1000:03d}-{i // 100 % 100:02d}-{i % 100:02d}",
+            "photo_url": f"https://hr-mnenie.com/upload/photos/{i:08d}.jpg",
+        }
+        for i in range(count)
+    ]
+
+
+def bench_save_per_record(records: list, workdir: str) -> float:
+    path = os.path.join(workdir, "per_record.xlsx")
+    start = time.perf_counter()
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["ФИО", "Телефон", "Фото (ссылка)"])
+    workbook.save(path)
+    for record in records:
+        sheet.append([record["full_name"], record["phone"], record["photo_url"]])
+        workbook.save(path)
+    return time.perf_counter() - start
+
+
+def bench_journal(records: list, workdir: str, fsync: bool) -> float:
+    journal_path = os.path.join(workdir, f"journal_{int(fsync)}.jsonl")
+    path = os.path.join(workdir, "journal.xlsx")
+    start = time.perf_counter()
+    with CandidateJournal(journal_path, fsync=fsync) as journal:
+        for record in records:
+            journal.append(record)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["ФИО", "Телефон", "Фото (ссылка)"])
+    for record in CandidateJournal.read(journal_path):
+        sheet.append([record["full_name"], record["phone"], record["photo_url"]])
+    workbook.save(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--skip-per-record", action="store_true",
+                        help="не запускать вариант с сохранением xlsx после каждой записи (долго на 10k)")
+    args = parser.parse_args()
+
+    print(f"{'строк':>8} {'xlsx на запись':>16} {'журнал+fsync':>14} {'журнал':>10}")
+    for count in args.rows:
+        records = synthetic_records(count)
+        with tempfile.TemporaryDirectory() as workdir:
+            per_record = None if args.skip_per_record else bench_save_per_record(records, workdir)
+            with_fsync = bench_journal(records, workdir, fsync=True)
+            without_fsync = bench_journal(records, workdir, fsync=False)
+        per_record_text = "—" if per_record is None else f"{per_record:.2f} с"
+        print(f"{count:>8} {per_record_text:>16} {with_fsync:>12.2f} с {without_fsync:>8.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Сбор ссылок со страницы выдачи: LISTING_LINKS_JS в браузере против parse_listing_html
+на том же сохранённом HTML. Проверяет, что оба способа дают одинаковый список,
+и сравнивает время.
+
+Используется benchmarks/fixtures/hr_listing.html.
+Запуск из корня проекта (нужны Firefox и geckodriver):
+    python benchmarks/bench_listing_links.py --repeat 20
+Без браузера проверяется только разбор HTML по ожидаемому списку:
+    python benchmarks/bench_listing_links.py --offline
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_harvester import parse_listing_html, harvest_page
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "hr_listing.html"
+
+# Что возвращает LISTING_LINKS_JS для фикстуры, открытой с адреса BASE_URL
+BASE_URL = "https://hr-mnenie.com/candidates/"
+EXPECTED = [
+    "https://hr-mnenie.com/resume/101",
+    "https://hr-mnenie.com/resume/102",
+    "https://hr-mnenie.com/candidates/resume/103",
+    "https://hr-mnenie.com/resume/104",
+    None,
+    "",
+    "https://hr-mnenie.com/resume/108",
+    "https://hr-mnenie.com/resume/108",
+]
+
+
+def check_offline(html: str) -> bool:
+    links = parse_listing_html(html, base_url=BASE_URL)
+    if links != EXPECTED:
+        print("parse_listing_html расходится с ожидаемым списком:")
+        for index, (got, expected) in enumerate(zip(links + [None] * len(EXPECTED), EXPECTED)):
+            print(f"  {index}: {got!r} {'==' if got == expected else '!='} {expected!r}")
+        if len(links) > len(EXPECTED):
+            print(f"  лишние ссылки: {links[len(EXPECTED):]}")
+        return False
+    print(f"parse_listing_html: {len(links)} заголовков, совпадает с ожидаемым")
+    return True
+
+
+def check_browser(html: str, repeat: int) -> bool:
+    from parser_browser import create_parser_driver
+
+    driver = create_parser_driver("lean")
+    try:
+        driver.get(FIXTURE.as_uri())
+        base_url = driver.current_url
+        start = time.perf_counter()
+        for _ in range(repeat):
+            js_links = harvest_page(driver)
+        js_time = (time.perf_counter() - start) / repeat
+    finally:
+        driver.quit()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        html_links = parse_listing_html(html, base_url=base_url)
+    html_time = (time.perf_counter() - start) / repeat
+
+    print(f"LISTING_LINKS_JS:   {js_time * 1000:>8.2f} мс, ссылок: {len(js_links)}")
+    print(f"parse_listing_html: {html_time * 1000:>8.2f} мс, ссылок: {len(html_links)}")
+    if js_links != html_links:
+        print("Списки расходятся:")
+        for index in range(max(len(js_links), len(html_links))):
+            js_link = js_links[index] if index < len(js_links) else "—"
+            html_link = html_links[index] if index < len(html_links) else "—"
+            print(f"  {index}: JS {js_link!r}, HTML {html_link!r}")
+        return False
+    print("Списки совпадают")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--offline", action="store_true", help="не запускать браузер")
+    args = parser.parse_args()
+
+    html = FIXTURE.read_text(encoding="utf-8")
+    ok = check_offline(html)
+    if not args.offline:
+        ok = check_browser(html, args.repeat) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
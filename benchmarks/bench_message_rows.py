@@ -0,0 +1,113 @@
+"""
+Разбор строк входящих сообщений: прежний способ (несколько find_element на строку)
+против одного execute_script на все строки. Считает запросы к chromedriver и время.
+
+Используется сохранённая страница чата benchmarks/fixtures/whatsapp_chat.html.
+Запуск из корня проекта (нужен Chrome):
+    python benchmarks/bench_message_rows.py --repeat 5
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+
+from constants import SELECTOR_CONSTANTS
+from driver_binary import resolve_chromedriver
+from message_rows import extract_rows, parse_sender
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "whatsapp_chat.html"
+
+
+class CountingDriver(webdriver.Chrome):
+    """
+    Chrome, считающий команды, отправленные chromedriver.
+    """
+
+    round_trips = 0
+
+    def execute(self, driver_command, params=None):
+        self.round_trips += 1
+        return super().execute(driver_command, params)
+
+
+def legacy_rows(driver, rows: list) -> list:
+    """
+    Разбор, как в get_new_messages_unread до пакетного извлечения.
+    """
+    parsed = []
+    for row in rows:
+        item = {"meta": None, "sender_label": None, "kind": "text", "text": ""}
+        try:
+            item["meta"] = row.find_element(By.XPATH, SELECTOR_CONSTANTS["meta_xpath"]).get_attribute("data-pre-plain-text")
+        except Exception:
+            try:
+                item["sender_label"] = row.find_element(By.XPATH, SELECTOR_CONSTANTS["sender_xpath"]).get_attribute("aria-label")
+            except Exception:
+                pass
+        if row.find_elements(By.XPATH, SELECTOR_CONSTANTS["audio_button_xpath"]):
+            item["kind"] = "audio"
+        elif row.find_elements(By.XPATH, SELECTOR_CONSTANTS["file_download_button_xpath"]):
+            item["kind"] = "file"
+            button = row.find_element(By.XPATH, SELECTOR_CONSTANTS["file_download_button_xpath"])
+            item["download_title"] = button.get_attribute("title")
+            for key, xpath in (("file_type", "file_type_xpath"), ("file_size", "file_size_xpath")):
+                try:
+                    item[key] = row.find_element(By.XPATH, SELECTOR_CONSTANTS[xpath]).text
+                except Exception:
+                    item[key] = None
+        elif row.find_elements(By.XPATH, SELECTOR_CONSTANTS["image_xpath"]):
+            item["kind"] = "image"
+        else:
+            try:
+                item["text"] = row.find_element(By.XPATH, SELECTOR_CONSTANTS["text_xpath"]).text.strip()
+            except Exception:
+                pass
+        parsed.append(item)
+    return parsed
+
+
+def measure(driver, method, repeat: int) -> dict:
+    rows = driver.find_elements(By.XPATH, SELECTOR_CONSTANTS["message_in_xpath"])
+    driver.round_trips = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parsed = method(driver, rows)
+    elapsed = (time.perf_counter() - start) / repeat
+    return {"rows": len(rows), "round_trips": driver.round_trips // repeat, "elapsed": elapsed, "parsed": parsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    driver = CountingDriver(service=Service(resolve_chromedriver()), options=options)
+    try:
+        driver.get(FIXTURE.as_uri())
+        legacy = measure(driver, legacy_rows, args.repeat)
+        batch = measure(driver, extract_rows, args.repeat)
+    finally:
+        driver.quit()
+
+    # Оба способа должны давать одинаковый результат
+    for old, new in zip(legacy["parsed"], batch["parsed"]):
+        assert old["kind"] == new["kind"] and parse_sender(old) == parse_sender(new), (old, new)
+        assert old["text"] == new["text"], (old, new)
+
+    print(f"Строк сообщений: {batch['rows']}")
+    print(f"{'способ':>10} {'запросов':>9} {'время':>10}")
+    for name, result in (("find_element", legacy), ("batch", batch)):
+        print(f"{name:>10} {result['round_trips']:>9} {result['elapsed'] * 1000:>7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
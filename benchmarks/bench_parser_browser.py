@@ -0,0 +1,54 @@
+"""
+Сравнение режимов браузера парсера ("full" и "lean"): время запуска, время загрузки
+страниц и память (RSS) всего дерева процессов geckodriver/Firefox.
+
+Запуск из корня проекта (нужны Firefox и geckodriver):
+    python benchmarks/bench_parser_browser.py --repeat 3 https://hr-mnenie.com/
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser_browser import create_parser_driver, page_load_time, browser_stats
+
+
+def bench_mode(mode: str, urls: list, repeat: int) -> dict:
+    start = time.perf_counter()
+    driver = create_parser_driver(mode)
+    startup = time.perf_counter() - start
+    try:
+        loads = []
+        for _ in range(repeat):
+            for url in urls:
+                driver.get(url)
+                loads.append(page_load_time(driver))
+        stats = browser_stats(driver)
+    finally:
+        driver.quit()
+    return {
+        "startup": startup,
+        "load_avg": sum(loads) / len(loads),
+        "load_max": max(loads),
+        "rss_mb": stats["rss_bytes"] / 1024 / 1024,
+        "processes": stats["processes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", default=["https://hr-mnenie.com/"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'режим':>6} {'запуск':>8} {'загрузка ср.':>13} {'загрузка макс.':>15} {'RSS':>9} {'процессов':>10}")
+    for mode in ("full", "lean"):
+        result = bench_mode(mode, args.urls, args.repeat)
+        print(f"{mode:>6} {result['startup']:>6.2f} с {result['load_avg']:>11.2f} с {result['load_max']:>13.2f} с "
+              f"{result['rss_mb']:>6.0f} МБ {result['processes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
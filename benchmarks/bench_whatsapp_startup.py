@@ -0,0 +1,66 @@
+"""
+Время запуска Chrome для WhatsApp Web: холодный старт (версия chromedriver определяется
+через webdriver-manager), старт с закреплённым драйвером и /open на заранее
+запущенном браузере.
+
+Запуск из корня проекта (нужен Chrome):
+    python benchmarks/bench_whatsapp_startup.py --account bench
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver_binary
+from whatsapp_driver import WhatsAppSession
+
+
+def timed_open(session: WhatsAppSession) -> dict:
+    start = time.perf_counter()
+    try:
+        session.open_browser_and_login()
+    except Exception as e:
+        # Для замера достаточно, что страница открылась; вход по QR не нужен
+        print(f"  ({e})")
+    return dict(session.startup_timings, total=time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--account", default="bench")
+    args = parser.parse_args()
+
+    results = {}
+
+    # 1. Холодный старт: как раньше, версия драйвера определяется через webdriver-manager
+    if os.path.exists(driver_binary._PIN_FILE):
+        os.remove(driver_binary._PIN_FILE)
+    driver_binary._resolved_path = None
+    session = WhatsAppSession(args.account)
+    results["cold"] = timed_open(session)
+    session.close_driver()
+
+    # 2. Новый процесс с закреплённым драйвером: только проверка контрольной суммы
+    driver_binary._resolved_path = None
+    session = WhatsAppSession(args.account)
+    results["pinned"] = timed_open(session)
+    session.close_driver()
+
+    # 3. Браузер запущен заранее: /open проверяет только состояние страницы
+    session = WhatsAppSession(args.account)
+    session.prewarm()
+    results["prewarmed"] = timed_open(session)
+    session.close_driver()
+
+    print(f"{'режим':>10} {'драйвер':>9} {'запуск':>8} {'/open':>8}")
+    for name, timings in results.items():
+        # У заранее запущенного браузера запуск не входит во время /open
+        resolve = 0.0 if timings.get("warm") else timings.get("resolve_driver", 0.0)
+        launch = 0.0 if timings.get("warm") else timings.get("launch_browser", 0.0)
+        print(f"{name:>10} {resolve:>7.2f} с {launch:>6.2f} с {timings['total']:>6.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import re
+import time
+import sqlite3
+import threading
+
+from constants import CANDIDATE_INDEX_DB
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Приводит номер к виду 79123456789. Для пустых и незаполненных значений возвращает None.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return None
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    elif len(digits) == 10:
+        digits = "7" + digits
+    return digits
+
+
+class CandidateIndex:
+    """
+    Постоянный индекс кандидатов, уже отправленных пользователям, по ссылке на анкету
+    и нормализованному телефону. Позволяет не открывать повторно известные анкеты.
+    """
+
+    def __init__(self, db_file: str = CANDIDATE_INDEX_DB):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                profile_url TEXT PRIMARY KEY,
+                phone TEXT,
+                full_name TEXT,
+                photo_url TEXT,
+                first_seen REAL,
+                last_seen REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_phone ON candidates(phone)")
+        self._conn.commit()
+
+    def get(self, profile_url: str) -> dict:
+        if not profile_url:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT full_name, phone, photo_url FROM candidates WHERE profile_url = ?", (profile_url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"full_name": row[0], "phone": row[1], "photo_url": row[2], "resume_url": profile_url}
+
+    def is_known_phone(self, phone: str) -> bool:
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return False
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM candidates WHERE phone = ? LIMIT 1", (normalized,)
+            ).fetchone() is not None
+
+    def add_many(self, records: list) -> int:
+        """
+        Добавляет (или обновляет) кандидатов одной транзакцией. Записи без ссылки на анкету пропускаются.
+        """
+        now = time.time()
+        rows = [
+            (record["resume_url"], normalize_phone(record.get("phone")), record.get("full_name"),
+             record.get("photo_url"), now, now)
+            for record in records if record.get("resume_url")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO candidates (profile_url, phone, full_name, photo_url, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(profile_url) DO UPDATE SET
+                    phone = COALESCE(excluded.phone, candidates.phone),
+                    full_name = excluded.full_name,
+                    photo_url = excluded.photo_url,
+                    last_seen = excluded.last_seen
+            """, rows)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,58 @@
+import os
+import json
+import logging
+
+from constants import PARSER_JOURNAL_FSYNC
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateJournal:
+    """
+    Журнал собранных кандидатов в формате JSON Lines (одна запись — одна строка).
+    Запись только дописывается в конец, поэтому стоимость не зависит от числа уже
+    собранных кандидатов, а после сбоя журнал читается до последней целой строки.
+    """
+
+    def __init__(self, path: str, fsync: bool = PARSER_JOURNAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            # fdatasync не обновляет метаданные файла и поэтому дешевле полного fsync
+            sync = getattr(os, "fdatasync", os.fsync)
+            sync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def read(path: str) -> list:
+        """
+        Читает все записи журнала. Недописанная последняя строка (сбой во время записи) пропускается.
+        """
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Повреждённая строка %d в журнале %s пропущена", line_number, path)
+        return records
@@ -0,0 +1,161 @@
+import time
+import queue
+import asyncio
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from constants import WA_QUEUE_LATENCY_WINDOW, WA_QUEUE_SLOW_WAIT
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class CommandQueue:
+    """
+    Очередь команд одного браузера: все обращения к WebDriver выполняются по очереди в отдельном
+    потоке, команды с меньшим приоритетом (интерактивные отправки) обгоняют массовые опросы.
+    Пока команда выполняется, поток держит lock сессии, поэтому простаивающим считается только
+    браузер без выполняющихся и ожидающих команд.
+    """
+
+    def __init__(self, name: str, lock=None, latency_window: int = WA_QUEUE_LATENCY_WINDOW):
+        self.name = name
+        self.lock = lock or threading.RLock()
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._state_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._pending = {}          # приоритет -> число ожидающих команд
+        self._running = None        # (название команды, время начала)
+        self._wait_times = deque(maxlen=latency_window)
+        self._run_times = deque(maxlen=latency_window)
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        with self._state_lock:
+            return sum(self._pending.values())
+
+    def busy(self) -> bool:
+        with self._state_lock:
+            return self._running is not None or any(self._pending.values())
+
+    def submit(self, priority: int, func, *args, **kwargs) -> Future:
+        """
+        Ставит команду в очередь и возвращает Future с её результатом.
+        Вызов из потока очереди выполняется сразу, иначе команда ждала бы сама себя.
+        """
+        future = Future()
+        if threading.current_thread() is self._thread:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self._state_lock:
+            if self._closed:
+                raise Exception(f"Очередь команд {self.name} закрыта.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name=f"commands-{self.name}")
+                self._thread.start()
+            self._pending[priority] = self._pending.get(priority, 0) + 1
+            self._queue.put((priority, next(self._order), time.monotonic(), func, args, kwargs, future))
+        return future
+
+    async def run(self, priority: int, func, *args, **kwargs):
+        """
+        То же, что submit, но для asyncio: результат ожидается без блокировки цикла событий.
+        """
+        return await asyncio.wrap_future(self.submit(priority, func, *args, **kwargs))
+
+    def _run(self):
+        while True:
+            priority, _, enqueued_at, func, args, kwargs, future = self._queue.get()
+            if func is _STOP:
+                break
+            with self._state_lock:
+                self._pending[priority] -= 1
+            # Вызывающий мог отменить ожидание (например, HTTP-клиент отключился)
+            if not future.set_running_or_notify_cancel():
+                continue
+            name = getattr(func, "__name__", repr(func))
+            started = time.monotonic()
+            waited = started - enqueued_at
+            if waited > WA_QUEUE_SLOW_WAIT:
+                logger.warning("%s: команда %s ждала в очереди %.1f с", self.name, name, waited)
+            with self._state_lock:
+                self._running = (name, started)
+            try:
+                with self.lock:
+                    result = func(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                failed = True
+            else:
+                future.set_result(result)
+                failed = False
+            with self._state_lock:
+                self._running = None
+                self._wait_times.append(waited)
+                self._run_times.append(time.monotonic() - started)
+                self.completed += 1
+                self.failed += failed
+
+    def stats(self) -> dict:
+        """
+        Глубина очереди по приоритетам и задержки последних команд (ожидание в очереди и выполнение, мс).
+        """
+        with self._state_lock:
+            waits = list(self._wait_times)
+            runs = list(self._run_times)
+            running = self._running
+            pending = {priority: count for priority, count in sorted(self._pending.items()) if count}
+            completed, failed = self.completed, self.failed
+        return {
+            "depth": sum(pending.values()),
+            "pending_by_priority": pending,
+            "running": {"command": running[0], "seconds": round(time.monotonic() - running[1], 1)} if running else None,
+            "completed": completed,
+            "failed": failed,
+            "wait_ms": {"p50": round(_percentile(waits, 0.5) * 1000), "p95": round(_percentile(waits, 0.95) * 1000),
+                        "max": round(max(waits, default=0) * 1000)},
+            "run_ms": {"p50": round(_percentile(runs, 0.5) * 1000), "p95": round(_percentile(runs, 0.95) * 1000),
+                       "max": round(max(runs, default=0) * 1000)},
+        }
+
+    def close(self):
+        """
+        Отклоняет ожидающие команды и останавливает поток после текущей команды.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        while True:
+            try:
+                priority, _, _, _, _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._state_lock:
+                self._pending[priority] -= 1
+            if future.set_running_or_notify_cancel():
+                future.set_exception(Exception(f"Сессия {self.name} закрыта до выполнения команды."))
+        if thread:
+            self._queue.put((float("-inf"), next(self._order), 0, _STOP, (), {}, None))
+            if thread is not threading.current_thread():
+                thread.join()
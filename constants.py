@@ -58,3 +58,92 @@ SELECTOR_CONSTANTS = {
     "search_input_xpath": "//p[@class='selectable-text copyable-text x15bjb6t x1n2onr6']",
     "contact_item_xpath": "//div[@role='listitem']",
 }
+
+# Загрузка фотографий кандидатов для Excel (excel_photo_replacer.py)
+PHOTO_FETCH_WORKERS = 16      # Общее число потоков загрузки
+PHOTO_FETCH_PER_HOST = 6      # Максимум одновременных запросов к одному хосту
+PHOTO_FETCH_TIMEOUT = 10      # Таймаут одного запроса (в секундах)
+
+# Кэш фотографий (photo_cache.py)
+PHOTO_CACHE_DIR = os.path.join(CURRENT_DIR, "downloaded_images")
+PHOTO_CACHE_MAX_BYTES = 500 * 1024 * 1024     # Предельный размер кэша
+PHOTO_CACHE_MAX_AGE = 30 * 24 * 3600          # Удалять записи, не запрашивавшиеся дольше (сек)
+PHOTO_CACHE_REVALIDATE_AFTER = 24 * 3600      # После этого срока запись проверяется через ETag/Last-Modified
+
+# Миниатюры фотографий для встраивания в Excel
+PHOTO_THUMBNAIL_HEIGHT = 100  # Высота изображения в ячейке (в пикселях)
+PHOTO_THUMBNAIL_QUALITY = 80  # Качество JPEG (1-95)
+
+# Парсер hr-mnenie.com (app.py)
+PARSER_RUNS_DIR = os.path.join(CURRENT_DIR, "parser_runs")
+PARSER_JOURNAL_FSYNC = True          # Сбрасывать журнал на диск после каждой записи
+PARSER_XLSX_CHECKPOINT_EVERY = 0     # Сохранять промежуточный xlsx каждые N кандидатов (0 — только в конце)
+PARSER_FILTERS = {                   # Фильтры поиска кандидатов (входят в ключ контрольной точки)
+    "age_from": 18,
+    "age_to": 25,
+    "age_specified": True,
+    "gender": "Женский",
+}
+CANDIDATE_INDEX_DB = os.path.join(CURRENT_DIR, "candidates.db")
+PARSER_SKIP_KNOWN_CANDIDATES = True  # Не открывать анкеты кандидатов, уже отправленных в прошлых запусках
+PARSER_DELTA_ONLY = False            # True — в итоговый файл попадают только новые кандидаты (по умолчанию файл полный)
+PARSER_WAIT_TIMEOUT = 15             # Максимальное ожидание условия на странице (сек)
+PARSER_MIN_ACTION_INTERVAL = 0.5     # Минимальный интервал между действиями на сайте (сек)
+PARSER_MIN_RESUME_INTERVAL = 3.0     # Минимальный интервал между открытиями анкет (сек)
+PARSER_NETWORK_IDLE_TIME = 0.5       # Сколько сеть должна «молчать», чтобы страница считалась загруженной
+
+# Селекторы страницы анкеты hr-mnenie.com (resume_extractor.py)
+RESUME_SELECTORS = {
+    "show_contacts_xpath": "//a[contains(@class, 'result-item-main-info__btn') and contains(text(), 'Показать контакты')]",
+    "phone_link_xpath": "//a[contains(@class, 'result-item-main-contact__link') and contains(@href, 'tel:')]",
+    "resume_title_xpath": "//h3[contains(@class, 'result-item-head__title')]",
+    # Заголовки анкет на странице выдачи
+    "listing_title_xpath": "//div[contains(@class, 'resume-data__title')]",
+    "listing_title_css": "div[class*='resume-data__title']",
+}
+# Поля анкеты, извлекаемые за один вызов execute_script: CSS-селектор и свойство DOM-элемента
+RESUME_FIELD_SELECTORS = {
+    "full_name": {"css": "h3[class*='result-item-head__title']", "property": "innerText"},
+    "phone": {"css": "a[class*='result-item-main-contact__link'][href*='tel:']", "property": "innerText"},
+    "photo_url": {"css": "div[class*='result-item-main-image'] img", "property": "src"},
+}
+
+# Профиль браузера парсера (parser_browser.py): "lean" — без окна, картинок и шрифтов; "full" — как раньше
+PARSER_BROWSER_MODE = "lean"
+PARSER_LEAN_WINDOW_SIZE = (1280, 800)
+PARSER_SESSIONS_DIR = os.path.join(CURRENT_DIR, "parser_sessions")  # Сохранённые cookies hr-mnenie.com
+PARSER_KEEP_BROWSER_WARM = True      # Не закрывать авторизованный браузер между запусками
+PARSER_DETAIL_WORKERS = 1            # Число браузеров, параллельно открывающих анкеты (1 — последовательно)
+PARSER_MAX_RESUMES_PER_MINUTE = 20   # Общий предел частоты открытия анкет и страниц выдачи для всех браузеров и запусков
+PARSER_MAX_CONCURRENT_JOBS = 2       # Сколько запусков парсера выполняются одновременно (каждый в своём браузере)
+PARSER_PROGRESS_INTERVAL = 5         # Не чаще чем раз в N секунд обновлять сообщение о прогрессе в Telegram
+PARSER_METRICS_FILE = os.path.join(PARSER_RUNS_DIR, "metrics.jsonl")  # Итоги запусков для оценки пропускной способности
+
+# Запуск Chrome для WhatsApp Web
+DRIVER_CACHE_DIR = os.path.join(CURRENT_DIR, "drivers")   # Закреплённая копия chromedriver и её контрольная сумма
+DRIVER_PIN_MAX_AGE = 7 * 24 * 3600   # Раз в неделю версия драйвера определяется заново (обновления Chrome)
+WA_PREWARM_ACCOUNTS = []             # Аккаунты, для которых Chrome запускается заранее при старте сервиса
+WA_OBSERVER_DRAIN_INTERVAL = 2       # Как часто забирать сообщения, накопленные наблюдателем в странице (секунды)
+WA_OBSERVER_BUFFER_LIMIT = 5000      # Максимум событий в буфере страницы между выборками
+WA_OBSERVER_SETTLE = 1.5             # Сколько секунд после открытия чата его догружаемая история не считается новыми сообщениями
+WA_UNREAD_ANCHOR_TIMEOUT = 5         # Ожидание метки «непрочитанные» в открытом чате (на попытку)
+WA_FALLBACK_MAX_ROWS = 50            # Без метки «непрочитанные» разбираются только последние N входящих
+DOWNLOAD_WATCH_POLL_INTERVAL = 0.2   # Интервал проверки папки загрузок, если inotify недоступен
+WA_BLOB_FETCH = True                 # Читать изображения и голосовые из blob: в странице вместо «Скачать» в контекстном меню
+WA_BLOB_CHUNK_BYTES = 2 * 1024 * 1024  # Крупные blob передаются из страницы частями такого размера
+WA_MEDIA_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Предельный размер медиафайлов одного аккаунта
+WA_MEDIA_MAX_AGE = 90 * 24 * 3600    # Медиафайлы, не использовавшиеся дольше, удаляются
+WA_MEDIA_EVICT_INTERVAL = 3600       # Как часто проверять ограничения медиафайлов (секунды)
+
+# Ограничения браузеров WhatsApp на одном сервере
+WA_MAX_LIVE_DRIVERS = 4              # Одновременно запущенных Chrome; остальные запросы ждут в очереди
+WA_DRIVER_QUEUE_TIMEOUT = 120        # Сколько запрос ждёт свободного места, прежде чем вернуть ошибку
+WA_SESSION_IDLE_TIMEOUT = 30 * 60    # Браузер, не использовавшийся дольше, закрывается (профиль сохраняется)
+WA_EVICT_MIN_IDLE = 60               # При нехватке мест закрывается самый давно использованный браузер, простаивающий хотя бы столько
+
+# Очередь команд браузера WhatsApp: меньшее значение выполняется раньше
+WA_PRIORITY_INTERACTIVE = 0          # Вход, отправка из бота и API
+WA_PRIORITY_DEFAULT = 5              # Список чатов, чтение буфера наблюдателя
+WA_PRIORITY_BULK = 10                # Обход непрочитанных, массовая рассылка
+WA_QUEUE_LATENCY_WINDOW = 200        # По скольким последним командам считаются задержки
+WA_QUEUE_SLOW_WAIT = 30              # Команда, ждавшая в очереди дольше (с), попадает в лог
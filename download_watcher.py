@@ -0,0 +1,195 @@
+import os
+import re
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from constants import DOWNLOAD_WATCH_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Временные имена, под которыми Chrome пишет файл до завершения загрузки
+PARTIAL_SUFFIXES = (".crdownload", ".tmp")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0x00000800
+_IN_CLOEXEC = 0x00080000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+def is_partial(name: str) -> bool:
+    return name.startswith(".") or name.endswith(PARTIAL_SUFFIXES)
+
+
+def matches_expected(expected: str, name: str) -> bool:
+    """
+    Совпадает ли имя с ожидаемым с учётом того, что Chrome при совпадении имён
+    сохраняет "report (1).pdf" вместо "report.pdf".
+    """
+    if expected is None or expected == name:
+        return True
+    stem, ext = os.path.splitext(expected)
+    return re.fullmatch(re.escape(stem) + r" \(\d+\)" + re.escape(ext), name) is not None
+
+
+class DownloadWatcher:
+    """
+    Следит за папкой загрузок аккаунта и сообщает о завершённых файлах (переименование
+    .crdownload в итоговое имя или закрытие записанного файла). В Linux использует inotify,
+    иначе опрашивает папку, перечитывая её только при изменении mtime.
+    Ожидающие регистрируются через expect() до начала загрузки и получают Future с именем файла.
+    """
+
+    def __init__(self, directory: str, poll_interval: float = DOWNLOAD_WATCH_POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._waiters = []          # [(Future, ожидаемое имя или None)] в порядке регистрации
+        self._stop = threading.Event()
+        self._fd = None
+        os.makedirs(directory, exist_ok=True)
+        if _libc:
+            self._fd = self._init_inotify()
+        self.mode = "inotify" if self._fd is not None else "scandir"
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"download-watcher-{os.path.basename(os.path.dirname(directory))}")
+        self._thread.start()
+
+    def _init_inotify(self):
+        fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            logger.warning("inotify недоступен (%s), папка загрузок будет опрашиваться",
+                           os.strerror(ctypes.get_errno()))
+            return None
+        mask = _IN_MOVED_TO | _IN_CLOSE_WRITE
+        if _libc.inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0:
+            logger.warning("Не удалось отслеживать %s через inotify: %s", self.directory,
+                           os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return None
+        return fd
+
+    def expect(self, name: str = None) -> Future:
+        """
+        Регистрирует ожидание следующего завершённого файла (или файла с именем name).
+        Вызывать до клика «Скачать», чтобы не пропустить быструю загрузку.
+        """
+        future = Future()
+        with self._lock:
+            self._waiters.append((future, name))
+        return future
+
+    def wait(self, future: Future, timeout: float) -> str:
+        """
+        Имя завершённого файла или None по истечении timeout.
+        """
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.discard(future)
+            return None
+
+    def discard(self, future: Future):
+        """
+        Снимает ожидание (например, если клик «Скачать» не удался), чтобы оно не забрало чужой файл.
+        """
+        if future is None:
+            return
+        with self._lock:
+            self._waiters = [(waiter, name) for waiter, name in self._waiters if waiter is not future]
+        future.cancel()
+
+    def _resolve(self, name: str):
+        if is_partial(name):
+            return
+        with self._lock:
+            for index, (future, expected) in enumerate(self._waiters):
+                if matches_expected(expected, name):
+                    del self._waiters[index]
+                    break
+            else:
+                return
+        if not future.done():
+            future.set_result(name)
+
+    def _run(self):
+        if self._fd is not None:
+            self._run_inotify()
+        else:
+            self._run_scandir()
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    continue
+                logger.error("Ошибка чтения inotify для %s: %s", self.directory, e)
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                # Chrome переименовывает .crdownload в итоговое имя; прямую запись завершает IN_CLOSE_WRITE
+                if name and mask & (_IN_MOVED_TO | _IN_CLOSE_WRITE):
+                    self._resolve(name)
+        os.close(self._fd)
+
+    def _run_scandir(self):
+        known = {entry.name for entry in os.scandir(self.directory)}
+        last_mtime = os.stat(self.directory).st_mtime_ns
+        while not self._stop.wait(self.poll_interval):
+            try:
+                # Папка перечитывается только когда в ней что-то создано или переименовано
+                mtime = os.stat(self.directory).st_mtime_ns
+                if mtime == last_mtime:
+                    continue
+                last_mtime = mtime
+                current = {entry.name for entry in os.scandir(self.directory)}
+            except OSError as e:
+                logger.warning("Ошибка чтения папки загрузок %s: %s", self.directory, e)
+                continue
+            for name in sorted(current - known, key=lambda n: self._mtime(n)):
+                self._resolve(name)
+            known = current
+
+    def _mtime(self, name: str) -> float:
+        try:
+            return os.stat(os.path.join(self.directory, name)).st_mtime
+        except OSError:
+            return time.time()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for future, _ in waiters:
+            future.cancel()
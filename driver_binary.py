@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+from constants import DRIVER_CACHE_DIR, DRIVER_PIN_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+_PIN_FILE = os.path.join(DRIVER_CACHE_DIR, "chromedriver.json")
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_pin() -> dict:
+    try:
+        with open(_PIN_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pin_is_valid(pin: dict) -> bool:
+    if not pin or time.time() - pin.get("resolved_at", 0) > DRIVER_PIN_MAX_AGE:
+        return False
+    path = pin.get("path")
+    if not path or not os.path.isfile(path):
+        return False
+    if _sha256(path) != pin.get("sha256"):
+        logger.warning("Контрольная сумма chromedriver не совпадает, драйвер будет получен заново")
+        return False
+    return True
+
+
+def _pin_driver() -> str:
+    """
+    Получает chromedriver через webdriver-manager (разрешение версии, при необходимости загрузка)
+    и копирует его в DRIVER_CACHE_DIR вместе с контрольной суммой.
+    """
+    source = ChromeDriverManager().install()
+    os.makedirs(DRIVER_CACHE_DIR, exist_ok=True)
+    target = os.path.join(DRIVER_CACHE_DIR, os.path.basename(source))
+    tmp_target = f"{target}.tmp"
+    shutil.copy2(source, tmp_target)
+    os.replace(tmp_target, target)
+    pin = {"path": target, "source": source, "sha256": _sha256(target), "resolved_at": time.time()}
+    tmp_pin = f"{_PIN_FILE}.tmp"
+    with open(tmp_pin, "w", encoding="utf-8") as f:
+        json.dump(pin, f, ensure_ascii=False)
+    os.replace(tmp_pin, _PIN_FILE)
+    return target
+
+
+def resolve_chromedriver(refresh: bool = False) -> str:
+    """
+    Путь к chromedriver. Определяется один раз на процесс: сначала по закреплённой
+    копии (проверяется контрольная сумма и возраст), иначе через webdriver-manager.
+    refresh=True сбрасывает закреплённую копию, например при несовпадении версии с Chrome.
+    """
+    global _resolved_path
+    with _resolve_lock:
+        if _resolved_path and not refresh:
+            return _resolved_path
+        start = time.perf_counter()
+        pin = None if refresh else _load_pin()
+        if _pin_is_valid(pin):
+            _resolved_path = pin["path"]
+            source = "закреплённая копия"
+        else:
+            _resolved_path = _pin_driver()
+            source = "webdriver-manager"
+        logger.info("chromedriver: %s (%s, %.2f сек)", _resolved_path, source, time.perf_counter() - start)
+        return _resolved_path
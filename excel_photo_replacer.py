@@ -1,75 +1,262 @@
 import os
+import math
+import time
+import threading
 import requests
-from openpyxl import load_workbook
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from openpyxl import Workbook, load_workbook
 from openpyxl.drawing.image import Image
 from io import BytesIO
 from urllib.parse import urlparse
+from PIL import Image as PILImage
 
-def replace_photo_urls_with_images():
+from constants import (PHOTO_FETCH_WORKERS, PHOTO_FETCH_PER_HOST, PHOTO_FETCH_TIMEOUT,
+                       PHOTO_THUMBNAIL_HEIGHT, PHOTO_THUMBNAIL_QUALITY)
+from photo_cache import PhotoCache, shared_photo_cache
+
+
+class PhotoFetcher:
+    """
+    Параллельная загрузка фотографий через общую keep-alive сессию
+    с ограничением числа одновременных запросов к одному хосту.
+    Если передан кэш, он проверяется до обращения к сети.
+    """
+
+    def __init__(self, workers: int = PHOTO_FETCH_WORKERS, per_host: int = PHOTO_FETCH_PER_HOST,
+                 timeout: int = PHOTO_FETCH_TIMEOUT, cache: PhotoCache = None):
+        self.workers = workers
+        self.cache = cache
+        self.per_host = per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url: str) -> dict:
+        """
+        Загружает одно изображение. Ошибки не выбрасываются, а возвращаются в поле "error".
+        """
+        start = time.perf_counter()
+        result = {"url": url, "content": None, "content_type": "", "error": None, "cache": None, "revalidated": False}
+        try:
+            entry = self.cache.lookup(url) if self.cache else None
+            cached = self.cache.read(url) if entry and self.cache.is_fresh(entry) else None
+            if cached is not None:
+                result["content"] = cached
+                result["content_type"] = entry["content_type"]
+                result["cache"] = "hit"
+            else:
+                if entry and self.cache.is_fresh(entry):
+                    # Запись вытеснена между lookup() и read(): загружаем заново без условий
+                    entry = None
+                headers = self.cache.validation_headers(entry) if entry else {}
+                with self._host_semaphore(url):
+                    response = self.session.get(url, timeout=self.timeout, headers=headers)
+                cached = self.cache.read(url, revalidated=True) if entry and response.status_code == 304 else None
+                if cached is None and response.status_code == 304:
+                    # Файл удалён после условного запроса — повторяем без условий
+                    with self._host_semaphore(url):
+                        response = self.session.get(url, timeout=self.timeout)
+                if cached is not None:
+                    result["content"] = cached
+                    result["content_type"] = entry["content_type"]
+                    result["cache"] = "hit"
+                    result["revalidated"] = True
+                else:
+                    response.raise_for_status()
+                    result["content"] = response.content
+                    result["content_type"] = response.headers.get('content-type', '')
+                    result["cache"] = "miss"
+                    if self.cache:
+                        if 'image' in result["content_type"]:
+                            self.cache.store(url, response.content, result["content_type"],
+                                             etag=response.headers.get('etag'),
+                                             last_modified=response.headers.get('last-modified'))
+                        else:
+                            self.cache.record_miss()
+        except Exception as e:
+            result["error"] = str(e)
+            if self.cache and result["cache"] is None:
+                self.cache.record_miss()
+        result["elapsed"] = time.perf_counter() - start
+        return result
+
+    def fetch_all(self, urls: dict) -> dict:
+        """
+        Загружает все URL параллельно. Принимает {ключ: url}, возвращает {ключ: результат}.
+        """
+        if not urls:
+            return {}
+        keys = list(urls)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(keys))) as executor:
+            results = executor.map(self.fetch, [urls[key] for key in keys])
+            return dict(zip(keys, results))
+
+    def close(self):
+        self.session.close()
+
+
+def make_thumbnail(content: bytes, height: int = PHOTO_THUMBNAIL_HEIGHT,
+                   quality: int = PHOTO_THUMBNAIL_QUALITY) -> bytes:
+    """
+    Декодирует изображение, уменьшает до высоты отображения в ячейке и перекодирует в JPEG.
+    Маленькие изображения не увеличиваются. Прозрачность заменяется белым фоном.
+    """
+    with PILImage.open(BytesIO(content)) as source:
+        # Для JPEG декодируем сразу в уменьшенном масштабе, не ниже целевого размера
+        source.draft("RGB", (max(1, source.width * height // max(1, source.height)), height))
+        if source.mode in ("RGBA", "LA", "P"):
+            rgba = source.convert("RGBA")
+            picture = PILImage.new("RGB", rgba.size, (255, 255, 255))
+            picture.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            picture = source.convert("RGB")
+    if picture.height > height:
+        width = max(1, round(picture.width * height / picture.height))
+        picture = picture.resize((width, height), PILImage.LANCZOS)
+    output = BytesIO()
+    picture.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def _percentile(values: list, percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def workbook_to_bytes(wb: Workbook) -> bytes:
+    """
+    Сериализует книгу в память (без промежуточных файлов).
     """
-    Автоматически обрабатывает input.xlsx, заменяет URL в столбце 'Фото (ссылка)' на изображения,
-    сохраняет результат в output.xlsx
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def embed_photos(wb: Workbook) -> Workbook:
     """
+    Заменяет URL в столбце 'Фото (ссылка)' активного листа на изображения.
+    Книга изменяется на месте и возвращается для удобства.
+    """
+    sheet = wb.active
+    photo_column = None
+    for cell in sheet[1]:
+        if "фото" in str(cell.value).lower():
+            photo_column = cell.column_letter
+            break
+
+    if not photo_column:
+        print("Ошибка: не найден столбец с фото в первой строке!")
+        return wb
+
+    # 1. Собираем ссылки со всего листа
+    urls = {}
+    for row in range(2, sheet.max_row + 1):
+        cell = sheet[f"{photo_column}{row}"]
+        url = cell.value if isinstance(cell.value, str) else ""
+        if not url or not url.startswith(('http://', 'https://')):
+            continue
+        if url.lower().endswith('.svg'):
+            print(f"Пропуск SVG изображения в {photo_column}{row}: {url}")
+            continue
+        urls[row] = url
+
+    # 2. Загружаем все изображения параллельно, начиная с кэша
+    fetch_start = time.perf_counter()
+    cache = shared_photo_cache()
+    fetcher = PhotoFetcher(cache=cache)
+    try:
+        fetched = fetcher.fetch_all(urls)
+    finally:
+        fetcher.close()
+        cache.evict()
+        cache.save()
+    fetch_total = time.perf_counter() - fetch_start
+
+    # 3. Встраиваем уменьшенные копии в порядке строк
+    original_bytes = 0
+    embedded_bytes = 0
+    for row in sorted(fetched):
+        result = fetched[row]
+        url = result["url"]
+        cell = sheet[f"{photo_column}{row}"]
+        try:
+            if result["error"]:
+                raise Exception(result["error"])
+            content_type = result["content_type"]
+            if 'image' not in content_type:
+                print(f"URL не является изображением в {photo_column}{row}: {url}")
+                continue
+            thumbnail = make_thumbnail(result["content"])
+            original_bytes += len(result["content"])
+            embedded_bytes += len(thumbnail)
+            img = Image(BytesIO(thumbnail))
+            img.width = int(img.width * (PHOTO_THUMBNAIL_HEIGHT / img.height))
+            img.height = PHOTO_THUMBNAIL_HEIGHT
+            sheet.add_image(img, f"{photo_column}{row}")
+            cell.value = None
+            sheet.row_dimensions[row].height = 80
+
+            print(f"Изображение добавлено в {photo_column}{row} из {url}")
+
+        except Exception as e:
+            print(f"Ошибка при обработке {url} в {photo_column}{row}: {str(e)}")
+            continue
+
+    timings = [result["elapsed"] for result in fetched.values()]
+    # Счётчики запуска — по его результатам: кэш общий для процесса и параллельных заданий
+    cache_stats = cache.stats()
+    hits = sum(1 for result in fetched.values() if result["cache"] == "hit")
+    revalidated = sum(1 for result in fetched.values() if result["revalidated"])
+    print(f"Оригинальные изображения сохранены в кэше: {cache.cache_dir}")
+    print(f"Загружено изображений: {len(fetched)} за {fetch_total:.2f} сек "
+          f"(p50: {_percentile(timings, 50):.2f} сек, p95: {_percentile(timings, 95):.2f} сек на изображение)")
+    print(f"Кэш: попаданий {hits} (из них перепроверено {revalidated}), "
+          f"промахов {len(fetched) - hits}, записей {cache_stats['entries']}, "
+          f"{cache_stats['bytes'] / 1024 / 1024:.1f} МБ")
+    print(f"Размер изображений: {original_bytes / 1024:.0f} КБ -> {embedded_bytes / 1024:.0f} КБ "
+          f"(сэкономлено {(original_bytes - embedded_bytes) / 1024:.0f} КБ)")
+    return wb
+
+
+def replace_photo_urls_with_images(workbook: Workbook = None) -> Workbook:
+    """
+    Если передана книга — встраивает изображения в неё в памяти и возвращает её.
+    Без аргументов автоматически обрабатывает input.xlsx, заменяет URL в столбце
+    'Фото (ссылка)' на изображения, сохраняет результат в output.xlsx
+    """
+    if workbook is not None:
+        return embed_photos(workbook)
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     input_file = os.path.join(script_dir, "input.xlsx")
     output_file = os.path.join(script_dir, "output.xlsx")
-    images_dir = os.path.join(script_dir, "downloaded_images")
     if not os.path.exists(input_file):
         print(f"Ошибка: файл {input_file} не найден в папке скрипта!")
-        return
-    
+        return None
+
     try:
-        wb = load_workbook(input_file)
-        sheet = wb.active
-        photo_column = None
-        for cell in sheet[1]: 
-            if "фото" in str(cell.value).lower():
-                photo_column = cell.column_letter
-                break
-        
-        if not photo_column:
-            print("Ошибка: не найден столбец с фото в первой строке!")
-            return
-        os.makedirs(images_dir, exist_ok=True)
-        for row in range(2, sheet.max_row + 1):
-            cell = sheet[f"{photo_column}{row}"]
-            url = cell.value if isinstance(cell.value, str) else ""
-            if not url or not url.startswith(('http://', 'https://')):
-                continue
-            if url.lower().endswith('.svg'):
-                print(f"Пропуск SVG изображения в {photo_column}{row}: {url}")
-                continue
-            
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                content_type = response.headers.get('content-type', '')
-                if 'image' not in content_type:
-                    print(f"URL не является изображением в {photo_column}{row}: {url}")
-                    continue
-                img_data = BytesIO(response.content)
-                img = Image(img_data)
-                ext = content_type.split('/')[-1] if '/' in content_type else 'jpg'
-                filename = os.path.join(images_dir, f"{sheet['A'+str(row)].value[:20]}_{row}.{ext}")
-                with open(filename, 'wb') as f:
-                    f.write(response.content)
-                img.height = 100
-                img.width = int(img.width * (100 / img.height))
-                sheet.add_image(img, f"{photo_column}{row}")
-                cell.value = None
-                sheet.row_dimensions[row].height = 80
-                
-                print(f"Изображение добавлено в {photo_column}{row} из {url}")
-            
-            except Exception as e:
-                print(f"Ошибка при обработке {url} в {photo_column}{row}: {str(e)}")
-                continue
+        wb = embed_photos(load_workbook(input_file))
         wb.save(output_file)
         print(f"\nГотово! Результат сохранен в {output_file}")
-        print(f"Оригинальные изображения сохранены в папке: {images_dir}")
-    
+        return wb
     except Exception as e:
         print(f"Критическая ошибка: {str(e)}")
+        return None
 
 if __name__ == "__main__":
-    replace_photo_urls_with_images()
\ No newline at end of file
+    replace_photo_urls_with_images()
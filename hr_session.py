@@ -0,0 +1,275 @@
+import os
+import time
+import pickle
+import threading
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from config import EMAIL, PASSWORD
+from constants import PARSER_SESSIONS_DIR, PARSER_KEEP_BROWSER_WARM
+from page_waits import PageWaiter
+from parser_browser import create_parser_driver
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://hr-mnenie.com/"
+PROFILE_LINK_LOCATOR = (By.XPATH, "//a[@href='/profile' and contains(@class, 'header__btn')]")
+
+
+class HRSession:
+    """
+    Авторизованный браузер hr-mnenie.com, который переиспользуется между запусками парсера.
+    Cookies сохраняются на диск, поэтому после перезапуска процесса полный вход
+    нужен только если сессия на сайте действительно истекла.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        os.makedirs(PARSER_SESSIONS_DIR, exist_ok=True)
+        self.cookies_file = os.path.join(PARSER_SESSIONS_DIR, f"{name}_cookies.pkl")
+        self.driver = None
+        self.waiter = None
+        self.lock = threading.RLock()
+
+    def get_driver(self):
+        """
+        Возвращает живой авторизованный браузер, создавая и авторизуя его при необходимости.
+        """
+        with self.lock:
+            if self.driver and not self._is_alive():
+                logger.warning("Браузер парсера '%s' недоступен, создаём новый", self.name)
+                self.driver = None
+            if not self.driver:
+                self.driver = create_parser_driver()
+                self.waiter = PageWaiter(self.driver)
+
+            if self.is_logged_in():
+                logger.info("Сессия парсера '%s' активна, вход не требуется", self.name)
+            elif self._restore_cookies() and self.is_logged_in():
+                logger.info("Сессия парсера '%s' восстановлена из cookies", self.name)
+            else:
+                logger.info("Сессия парсера '%s' истекла, выполняется полный вход", self.name)
+                self._full_login()
+            self._save_cookies()
+            return self.driver
+
+    def _is_alive(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def is_logged_in(self) -> bool:
+        """
+        Дешёвая проверка авторизации: на главной странице есть ссылка в личный кабинет.
+        """
+        if not self.driver.current_url.startswith(BASE_URL):
+            return False
+        if self.driver.current_url.rstrip("/") != BASE_URL.rstrip("/"):
+            self.driver.get(BASE_URL)
+        self.waiter.document_ready()
+        return bool(self.driver.find_elements(*PROFILE_LINK_LOCATOR))
+
+    def _restore_cookies(self) -> bool:
+        if not os.path.exists(self.cookies_file):
+            return False
+        try:
+            with open(self.cookies_file, "rb") as f:
+                cookies = pickle.load(f)
+            # Cookies можно добавить только для открытого домена
+            self.driver.get(BASE_URL)
+            for cookie in cookies:
+                if cookie.get("expiry") and cookie["expiry"] < time.time():
+                    continue
+                try:
+                    self.driver.add_cookie(cookie)
+                except WebDriverException:
+                    continue
+            self.driver.refresh()
+            return True
+        except Exception as e:
+            logger.warning("Не удалось восстановить cookies парсера: %s", e)
+            return False
+
+    def _save_cookies(self):
+        try:
+            with open(self.cookies_file, "wb") as f:
+                pickle.dump(self.driver.get_cookies(), f)
+        except Exception as e:
+            logger.warning("Не удалось сохранить cookies парсера: %s", e)
+
+    def _full_login(self):
+        """
+        Полный вход через модальное окно с вводом email и пароля.
+        """
+        self.driver.get("https://hr-mnenie.com/")
+        self.waiter.document_ready()
+        
+        try:
+            cookie_btn = self.driver.find_element(By.XPATH, "//button[contains(., 'Нет, спасибо') or contains(., 'Accept')]")
+            cookie_btn.click()
+        except:
+            pass
+        
+        modal_visible_js = """
+            return !!document.querySelector('div.popup-center') && 
+                window.getComputedStyle(document.querySelector('div.popup-center')).display !== 'none';
+        """
+        login_attempts = 0
+        while login_attempts < 3:
+            try:
+                login_btn = self.waiter.element((By.XPATH, "//button[contains(., 'Войти')]"), clickable=True, timeout=10)
+                ActionChains(self.driver).move_to_element(login_btn).pause(0.5).click().perform()
+                self.driver.execute_script("arguments[0].click();", login_btn)
+                login_btn.send_keys(Keys.RETURN)
+                break
+            except:
+                login_attempts += 1
+                self.driver.refresh()
+                self.waiter.document_ready()
+        
+        try:
+            self.waiter.until(lambda d: d.execute_script(modal_visible_js), timeout=15)
+            modal_loaded = True
+        except TimeoutException:
+            modal_loaded = False
+        
+        password_link = self.waiter.element(
+            (By.XPATH, "//a[contains(@class, 'popup-forget') and contains(., 'Войти с паролем')]"),
+            clickable=True, timeout=10)
+        password_link.click()
+        
+        if not modal_loaded:
+            raise Exception("Модальное окно не загрузилось")
+        
+        visible_input_js = """
+            var inputs = document.querySelectorAll(arguments[0]);
+            for (var i = 0; i < inputs.length; i++) {
+                var style = window.getComputedStyle(inputs[i]);
+                if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
+                    inputs[i].focus();
+                    return inputs[i];
+                }
+            }
+            return null;
+        """
+        try:
+            email_input = self.waiter.until(
+                lambda d: d.execute_script(visible_input_js, "input.popup-elem__input"), timeout=10)
+        except TimeoutException:
+            email_input = None
+        
+        if not email_input:
+            raise Exception("Не удалось найти видимое поле ввода")
+        
+        for attempt in range(3):
+            try:
+                email_input.clear()
+                for char in EMAIL:
+                    email_input.send_keys(char)
+                    time.sleep(0.1)
+                    current_value = email_input.get_attribute('value')
+                    if not current_value.endswith(char):
+                        email_input.send_keys(char)
+                
+                if email_input.get_attribute('value') == EMAIL:
+                    break
+            except:
+                if attempt == 2:
+                    raise Exception("Не удалось ввести email")
+                time.sleep(1)
+
+        password_input = self.driver.execute_script(visible_input_js, 'input.popup-elem__input[type="password"]')
+
+        if not password_input:
+            raise Exception("Не удалось найти видимое поле ввода пароля")
+
+        try:
+            password_input.clear()
+            for char in PASSWORD:
+                password_input.send_keys(char)
+                time.sleep(0.1)
+        except Exception as e:
+            raise Exception(f"Не удалось ввести пароль: {str(e)}")
+        
+        password_input.send_keys(Keys.RETURN)
+        self.waiter.element(PROFILE_LINK_LOCATOR, clickable=True, timeout=10)
+
+    def spawn_worker_driver(self):
+        """
+        Создаёт дополнительный браузер с cookies этой сессии для параллельной обработки анкет.
+        """
+        with self.lock:
+            cookies = self.driver.get_cookies()
+        driver = create_parser_driver()
+        try:
+            driver.get(BASE_URL)
+            for cookie in cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except WebDriverException:
+                    continue
+            driver.get(BASE_URL)
+            if not driver.find_elements(*PROFILE_LINK_LOCATOR):
+                logger.warning("Браузер-исполнитель не получил авторизацию по cookies сессии '%s'", self.name)
+            return driver
+        except Exception:
+            driver.quit()
+            raise
+
+    def release(self):
+        """
+        Возвращает браузер в пул после запуска: лишние вкладки закрываются, cookies сохраняются.
+        Если тёплый браузер не нужен, он закрывается.
+        """
+        with self.lock:
+            if not self.driver:
+                return
+            if not PARSER_KEEP_BROWSER_WARM or not self._is_alive():
+                self.close()
+                return
+            try:
+                handles = self.driver.window_handles
+                for handle in handles[1:]:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                self.driver.switch_to.window(handles[0])
+                self._save_cookies()
+            except WebDriverException as e:
+                logger.warning("Браузер парсера повреждён, закрываем: %s", e)
+                self.close()
+
+    def close(self):
+        with self.lock:
+            if self.driver:
+                try:
+                    self.driver.quit()
+                except Exception as e:
+                    logger.warning("Ошибка при закрытии браузера парсера: %s", e)
+                self.driver = None
+                self.waiter = None
+
+
+# Класс для управления сессиями парсера (по аналогии с WhatsAppManager)
+class HRSessionManager:
+    _sessions = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_session(cls, name: str = "default") -> HRSession:
+        with cls._lock:
+            if name not in cls._sessions:
+                cls._sessions[name] = HRSession(name)
+            return cls._sessions[name]
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
@@ -1,21 +1,41 @@
 import asyncio
 import logging
+from datetime import datetime
 from fastapi import FastAPI, HTTPException, Response
-from whatsapp_driver import WhatsAppManager
-from constants import ACCOUNTS_DIR
+from whatsapp_driver import WhatsAppManager, message_store
+from constants import ACCOUNTS_DIR, WA_PRIORITY_INTERACTIVE, WA_PRIORITY_DEFAULT, WA_PRIORITY_BULK
 
 app = FastAPI()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+@app.on_event("startup")
+async def prewarm_browsers():
+    """
+    Запускает Chrome для аккаунтов из WA_PREWARM_ACCOUNTS в фоне, не задерживая старт сервиса.
+    """
+    app.state.prewarm_task = asyncio.create_task(asyncio.to_thread(WhatsAppManager.prewarm))
+
+@app.on_event("shutdown")
+async def stop_prewarm():
+    """
+    Снимает ожидание фонового запуска Chrome при остановке сервиса; результат или ошибка — в лог.
+    """
+    prewarm_task = getattr(app.state, "prewarm_task", None)
+    if prewarm_task is None:
+        return
+    prewarm_task.cancel()
+    prewarm_result = (await asyncio.gather(prewarm_task, return_exceptions=True))[0]
+    if isinstance(prewarm_result, Exception):
+        logger.error("Ошибка предварительного запуска Chrome: %s", prewarm_result)
+
 @app.get("/open")
 async def api_open(account: str = "default"):
     """
     Эндпоинт для входа в аккаунт. Если вход не выполнен, возвращается QR‑код.
     """
     try:
-        session = WhatsAppManager.get_session(account)
-        result = await asyncio.to_thread(session.open_browser_and_login)
+        result = await WhatsAppManager.run(account, WA_PRIORITY_INTERACTIVE, "open_browser_and_login")
         # Если возвращён QR‑код, отправляем его как изображение
         if "qr_code" in result:
             return Response(content=result["qr_code"], media_type="image/png")
@@ -37,29 +57,20 @@ async def api_accounts():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/fleet")
+async def api_fleet():
+    """
+    Запущенные браузеры, очередь ожидающих и потребление памяти/CPU каждым Chrome.
+    """
+    return await asyncio.to_thread(WhatsAppManager.fleet_stats)
+
 @app.get("/chats")
 async def api_get_chats(account: str = "default"):
     """
     Возвращает список чатов для выбранного аккаунта.
     """
     try:
-        session = WhatsAppManager.get_session(account)
-        driver = session.get_driver(create_if_missing=False)
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.common.by import By
-        wait = WebDriverWait(driver, 60)
-        container = wait.until(EC.presence_of_element_located((By.XPATH, "//div[@aria-label='Список чатов']")))
-        chat_items = container.find_elements(By.XPATH, ".//div[@role='listitem']")
-        chats_list = []
-        for chat in chat_items:
-            try:
-                title = chat.find_element(By.XPATH, ".//span[@dir='auto' and @title]").get_attribute("title")
-                if title:
-                    chats_list.append({"chat": title})
-            except Exception:
-                continue
-        return {"chats": chats_list}
+        return await WhatsAppManager.run(account, WA_PRIORITY_DEFAULT, "get_chats")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при получении чатов: {e}")
 
@@ -69,8 +80,7 @@ async def api_send_message(chat: str, message: str, account: str = "default"):
     Отправляет текстовое сообщение в указанный чат.
     """
     try:
-        session = WhatsAppManager.get_session(account)
-        result = await asyncio.to_thread(session.send_message, chat, message)
+        result = await WhatsAppManager.run(account, WA_PRIORITY_INTERACTIVE, "send_message", chat, message)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -81,8 +91,7 @@ async def api_send_file(chat: str, file_path: str, account: str = "default"):
     Отправляет файл в указанный чат.
     """
     try:
-        session = WhatsAppManager.get_session(account)
-        result = await asyncio.to_thread(session.send_file, chat, file_path)
+        result = await WhatsAppManager.run(account, WA_PRIORITY_INTERACTIVE, "send_file", chat, file_path)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -104,8 +113,39 @@ async def api_get_new_messages_unread(account: str = "default"):
     Возвращает новые непрочитанные сообщения для выбранного аккаунта.
     """
     try:
-        session = WhatsAppManager.get_session(account)
-        new_msgs = await asyncio.to_thread(session.get_new_messages_unread)
+        new_msgs = await WhatsAppManager.run(account, WA_PRIORITY_BULK, "get_new_messages_unread")
         return {"new_messages": new_msgs}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при получении сообщений: {e}")
+
+@app.get("/observed_messages")
+async def api_observed_messages(account: str = "default"):
+    """
+    Возвращает сообщения, собранные наблюдателем в странице с прошлого вызова,
+    и чаты, в которых выросло число непрочитанных.
+    """
+    try:
+        return await WhatsAppManager.run(account, WA_PRIORITY_DEFAULT, "get_observed_messages")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка при получении сообщений: {e}")
+
+@app.get("/messages")
+async def api_messages(account: str = "default", chat: str = None, since: str = None,
+                       cursor: int = None, limit: int = 100):
+    """
+    Возвращает сохранённые сообщения из базы (без обращения к браузеру), по возрастанию времени.
+    since — дата/время в ISO-формате или epoch; cursor — next_cursor предыдущей страницы.
+    """
+    since_ts = None
+    if since:
+        try:
+            since_ts = float(since)
+        except ValueError:
+            try:
+                since_ts = datetime.fromisoformat(since).timestamp()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Параметр since: ожидается ISO-дата или epoch")
+    try:
+        return await asyncio.to_thread(message_store.query, account, chat, since_ts, cursor, min(max(limit, 1), 1000))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка при чтении сообщений: {e}")
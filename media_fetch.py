@@ -0,0 +1,100 @@
+import base64
+import logging
+import mimetypes
+
+from constants import SELECTOR_CONSTANTS, WA_BLOB_CHUNK_BYTES, DOWNLOAD_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Читает blob:-источники изображений и голосовых сообщений прямо в странице, все строки параллельно.
+# Небольшие файлы возвращаются сразу в base64, крупные остаются в window.__waBlobs и читаются частями.
+FETCH_BLOBS_JS = """
+var rows = arguments[0];
+var sel = arguments[1];
+var chunkSize = arguments[2];
+var done = arguments[arguments.length - 1];
+window.__waBlobs = window.__waBlobs || {};
+function first(ctx, xpath) {
+    return document.evaluate(xpath, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function source(row) {
+    var image = first(row, sel.image_xpath);
+    if (image) { return image.getAttribute('src'); }
+    var audio = row.querySelector('audio[src^="blob:"], audio source[src^="blob:"]');
+    return audio ? audio.getAttribute('src') : null;
+}
+function toBase64(blob) {
+    return new Promise(function (resolve, reject) {
+        var reader = new FileReader();
+        reader.onload = function () { resolve(reader.result.split(',', 2)[1] || ''); };
+        reader.onerror = function () { reject(reader.error); };
+        reader.readAsDataURL(blob);
+    });
+}
+Promise.all(rows.map(function (row, index) {
+    var src = source(row);
+    if (!src) { return Promise.resolve({error: 'blob не найден'}); }
+    return fetch(src).then(function (response) { return response.blob(); }).then(function (blob) {
+        if (blob.size <= chunkSize) {
+            return toBase64(blob).then(function (data) { return {mime: blob.type, size: blob.size, data: data}; });
+        }
+        var key = 'b' + Date.now() + '_' + index;
+        window.__waBlobs[key] = blob;
+        return {mime: blob.type, size: blob.size, key: key};
+    }).catch(function (error) { return {error: String(error)}; });
+})).then(done);
+"""
+
+READ_BLOB_CHUNK_JS = """
+var blob = window.__waBlobs && window.__waBlobs[arguments[0]];
+var done = arguments[arguments.length - 1];
+if (!blob) { done(null); return; }
+var reader = new FileReader();
+reader.onload = function () { done(reader.result.split(',', 2)[1] || ''); };
+reader.onerror = function () { done(null); };
+reader.readAsDataURL(blob.slice(arguments[1], arguments[1] + arguments[2]));
+"""
+
+RELEASE_BLOB_JS = "if (window.__waBlobs) { delete window.__waBlobs[arguments[0]]; }"
+
+
+def media_extension(mime: str, default: str) -> str:
+    ext = mimetypes.guess_extension((mime or "").split(";")[0].strip()) if mime else None
+    # mimetypes отдаёт для audio/ogg ".oga", WhatsApp и плееры ожидают ".ogg"
+    return {".oga": ".ogg", ".jpe": ".jpg"}.get(ext, ext) or default
+
+
+def _read_chunked(driver, result: dict, chunk_size: int) -> bytes:
+    parts = []
+    try:
+        for offset in range(0, result["size"], chunk_size):
+            chunk = driver.execute_async_script(READ_BLOB_CHUNK_JS, result["key"], offset, chunk_size)
+            if chunk is None:
+                raise Exception("blob освобождён до окончания чтения")
+            parts.append(base64.b64decode(chunk))
+    finally:
+        driver.execute_script(RELEASE_BLOB_JS, result["key"])
+    return b"".join(parts)
+
+
+def fetch_row_media(driver, rows: list, chunk_size: int = WA_BLOB_CHUNK_BYTES) -> list:
+    """
+    Содержимое медиа (изображение или голосовое) для каждой строки одним execute_async_script,
+    без контекстного меню и папки загрузок. Возвращает по элементу на строку:
+    {"content": bytes, "mime": str} или {"error": str} — тогда строку нужно скачать по-старому.
+    """
+    if not rows:
+        return []
+    driver.set_script_timeout(DOWNLOAD_TIMEOUT)
+    results = driver.execute_async_script(FETCH_BLOBS_JS, rows, SELECTOR_CONSTANTS, chunk_size) or []
+    media = []
+    for result in results:
+        if result.get("error"):
+            media.append({"error": result["error"]})
+            continue
+        try:
+            content = base64.b64decode(result["data"]) if "data" in result else _read_chunked(driver, result, chunk_size)
+            media.append({"content": content, "mime": result.get("mime") or ""})
+        except Exception as e:
+            media.append({"error": str(e)})
+    return media
@@ -0,0 +1,218 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from constants import DB_FILE, WA_MEDIA_MAX_BYTES, WA_MEDIA_MAX_AGE, WA_MEDIA_EVICT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class MediaStore:
+    """
+    Медиафайлы аккаунта, адресуемые по содержимому: accounts/<аккаунт>/media/<sha[:2]>/<sha><расширение>.
+    Одинаковые (например, пересланные) файлы хранятся один раз; связи сообщений с файлами
+    ведутся в DB_FILE. Старые и давно не использованные файлы удаляются
+    фоновым потоком по ограничениям размера и возраста.
+    """
+
+    def __init__(self, account: str, media_dir: str, db_file: str = DB_FILE,
+                 max_bytes: int = WA_MEDIA_MAX_BYTES, max_age: int = WA_MEDIA_MAX_AGE):
+        self.account = account
+        self.media_dir = media_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Сохранение и удаление файлов не пересекаются: иначе очистка может удалить файл, который только что переиспользован
+        self._files_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(media_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS media_blobs (
+                account TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (account, sha256)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS message_media (
+                account TEXT NOT NULL,
+                chat TEXT NOT NULL,
+                message_id TEXT,
+                sha256 TEXT NOT NULL,
+                original_name TEXT,
+                linked_at REAL NOT NULL,
+                evicted_at REAL,
+                UNIQUE (account, chat, message_id, sha256)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(message_media)")}
+        if "evicted_at" not in columns:
+            self._conn.execute("ALTER TABLE message_media ADD COLUMN evicted_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_media_blobs_used ON media_blobs(account, last_used_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_message_media_sha ON message_media(account, sha256)")
+        self._conn.commit()
+
+    def _blob_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.media_dir, digest[:2], f"{digest}{ext}")
+
+    def _target_path(self, digest: str, ext: str) -> str:
+        """
+        Путь для содержимого: уже сохранённый файл (даже с другим расширением) или новый.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM media_blobs WHERE account = ? AND sha256 = ?",
+                                     (self.account, digest)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return self._blob_path(digest, ext)
+
+    def _register(self, digest: str, path: str, size: int):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO media_blobs (account, sha256, path, size, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(account, sha256) DO UPDATE SET path = excluded.path, last_used_at = excluded.last_used_at
+            """, (self.account, digest, path, size, now, now))
+
+    def put_bytes(self, content: bytes, ext: str) -> tuple:
+        """
+        Сохраняет содержимое, если такого ещё нет. Возвращает (sha256, путь к файлу).
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._files_lock:
+            path = self._target_path(digest, ext)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            self._register(digest, path, len(content))
+        return digest, path
+
+    def put_file(self, source_path: str, ext: str = None) -> tuple:
+        """
+        Переносит загруженный файл в хранилище. Если такой файл уже есть, копия удаляется.
+        Возвращает (sha256, путь к файлу).
+        """
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        ext = os.path.splitext(source_path)[1] if ext is None else ext
+        size = os.path.getsize(source_path)
+        with self._files_lock:
+            path = self._target_path(digest, ext)
+            if os.path.exists(path):
+                os.remove(source_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(source_path, path)
+            self._register(digest, path, size)
+        return digest, path
+
+    def link(self, chat: str, message_id: str, digest: str, original_name: str = None):
+        """
+        Связывает сообщение с файлом; повторная связь после удаления файла снимает отметку evicted_at.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO message_media (account, chat, message_id, sha256, original_name, linked_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(account, chat, message_id, sha256) DO UPDATE SET evicted_at = NULL
+            """, (self.account, chat, message_id, digest, original_name, time.time()))
+
+    def _mark_evicted(self, digest: str, path: str, evicted_at: float):
+        """
+        Отмечает связи с удаляемым файлом и убирает путь к нему из сохранённых сообщений.
+        Вызывается внутри транзакции удаления.
+        """
+        self._conn.execute(
+            "UPDATE message_media SET evicted_at = ? WHERE account = ? AND sha256 = ? AND evicted_at IS NULL",
+            (evicted_at, self.account, digest))
+        has_messages = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'").fetchone()
+        if has_messages:
+            self._conn.execute("UPDATE messages SET file_path = NULL WHERE account = ? AND file_path = ?",
+                               (self.account, path))
+
+    def evict(self) -> dict:
+        """
+        Удаляет файлы старше max_age по последнему использованию, затем, пока общий размер
+        больше max_bytes, — давно не использованные. Связи сообщений с удалёнными файлами
+        сохраняются (по sha256) с отметкой evicted_at, а у самих сообщений очищается file_path.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT sha256, path, size, last_used_at FROM media_blobs
+                WHERE account = ? ORDER BY last_used_at
+            """, (self.account,)).fetchall()
+        total = sum(row[2] for row in rows)
+        expired = []
+        for digest, path, size, last_used_at in rows:
+            if now - last_used_at > self.max_age or total > self.max_bytes:
+                expired.append((digest, path, size, last_used_at))
+                total -= size
+        removed = 0
+        freed = 0
+        for digest, path, size, last_used_at in expired:
+            with self._files_lock:
+                with self._lock, self._conn:
+                    # Файл, использованный после выборки, не удаляется
+                    deleted = self._conn.execute(
+                        "DELETE FROM media_blobs WHERE account = ? AND sha256 = ? AND last_used_at = ?",
+                        (self.account, digest, last_used_at)).rowcount
+                    if deleted:
+                        self._mark_evicted(digest, path, now)
+                if not deleted:
+                    total += size
+                    continue
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Не удалось удалить медиафайл %s: %s", path, e)
+        if removed:
+            logger.info("Аккаунт %s: удалено медиафайлов: %d, освобождено %.1f МБ",
+                        self.account, removed, freed / 1024 / 1024)
+        return {"removed": removed, "freed_bytes": freed, "total_bytes": total}
+
+    def start_retention(self, interval: float = WA_MEDIA_EVICT_INTERVAL):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._retention_loop, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _retention_loop(self, interval: float):
+        while True:
+            try:
+                self.evict()
+            except Exception as e:
+                logger.error("Аккаунт %s: ошибка очистки медиафайлов: %s", self.account, e)
+            if self._stop.wait(interval):
+                break
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,258 @@
+import logging
+import threading
+
+from constants import SELECTOR_CONSTANTS, WA_OBSERVER_DRAIN_INTERVAL, WA_OBSERVER_BUFFER_LIMIT, WA_OBSERVER_SETTLE
+from message_rows import parse_pre_plain_text
+
+logger = logging.getLogger(__name__)
+
+# Устанавливает в странице WhatsApp Web наблюдатель за DOM. Новые входящие сообщения
+# открытого чата и рост счётчиков непрочитанных в списке чатов складываются в буфер
+# window.__waIngest.buffer. Новыми считаются только строки, добавленные в конец уже открытой
+# переписки: после открытия другого чата его отрисованная история (и догрузка в течение
+# settle мс) только запоминается, строки, подгруженные выше последней известной, пропускаются.
+# Селекторы передаются из SELECTOR_CONSTANTS (XPath). Повторная установка ничего не делает.
+INSTALL_OBSERVER_JS = """
+if (window.__waIngest) { return false; }
+var sel = arguments[0];
+var limit = arguments[1];
+var settle = arguments[2];
+var state = window.__waIngest = {buffer: [], dropped: 0, seen: {}, seenOrder: [], unread: {},
+                                 main: null, chat: null, settleUntil: 0, lastRow: null, installed_at: Date.now()};
+
+function first(ctx, xpath) {
+    return document.evaluate(xpath, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function all(ctx, xpath) {
+    var result = document.evaluate(xpath, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+    return nodes;
+}
+// Ключи уже учтённых сообщений; хранятся только последние, чтобы память страницы не росла
+function remember(key) {
+    if (state.seen[key]) { return false; }
+    state.seen[key] = true;
+    state.seenOrder.push(key);
+    if (state.seenOrder.length > limit * 4) { delete state.seen[state.seenOrder.shift()]; }
+    return true;
+}
+function push(item) {
+    if (state.buffer.length >= limit) { state.buffer.shift(); state.dropped++; }
+    state.buffer.push(item);
+}
+function chatTitle() {
+    var title = document.querySelector('#main header span[dir="auto"][title]') ||
+                document.querySelector('#main header span[dir="auto"]');
+    return title ? (title.getAttribute('title') || title.textContent) : 'Unknown Chat';
+}
+function serialize(row) {
+    var holder = row.closest('[data-id]');
+    var meta = first(row, sel.meta_xpath);
+    var item = {
+        kind: 'message',
+        id: holder ? holder.getAttribute('data-id') : null,
+        chat: chatTitle(),
+        meta: meta ? meta.getAttribute('data-pre-plain-text') : null,
+        sender: null, type: 'text', text: '', file_name: null, file_size: null
+    };
+    var senderNode = first(row, sel.sender_xpath);
+    if (senderNode) { item.sender = senderNode.getAttribute('aria-label'); }
+    var fileButton = first(row, sel.file_download_button_xpath);
+    if (first(row, sel.audio_button_xpath)) {
+        item.type = 'audio';
+    } else if (fileButton) {
+        item.type = 'file';
+        var match = /Скачать\\s+"(.+)"/.exec(fileButton.getAttribute('title') || '');
+        item.file_name = match ? match[1] : null;
+        var size = first(row, sel.file_size_xpath);
+        item.file_size = size ? size.textContent : null;
+    } else if (first(row, sel.image_xpath)) {
+        item.type = 'image';
+    } else {
+        var text = first(row, sel.text_xpath);
+        item.text = text ? text.innerText.trim() : '';
+    }
+    return item;
+}
+function rowKey(item) {
+    return item.id || (item.chat + '|' + item.meta + '|' + item.text);
+}
+function lastRenderedRow() {
+    var main = document.querySelector('#main');
+    var rows = main ? main.querySelectorAll('div.message-in, div.message-out') : [];
+    return rows.length ? rows[rows.length - 1] : null;
+}
+// Открыт другой чат (или тот же заново): вся отрисованная переписка считается прочитанной ранее
+function syncConversation() {
+    var main = document.querySelector('#main');
+    var chat = main ? chatTitle() : null;
+    if (main === state.main && chat === state.chat) { return false; }
+    state.main = main;
+    state.chat = chat;
+    state.settleUntil = Date.now() + settle;
+    all(document, sel.message_in_xpath).forEach(function (row) { remember(rowKey(serialize(row))); });
+    state.lastRow = lastRenderedRow();
+    return true;
+}
+function isAppended(row) {
+    return !state.lastRow || !state.lastRow.isConnected ||
+        Boolean(state.lastRow.compareDocumentPosition(row) & Node.DOCUMENT_POSITION_FOLLOWING);
+}
+function collectRows(node) {
+    if (node.nodeType !== 1) { return; }
+    var rows = node.matches('div.message-in') ? [node] : all(node, '.' + sel.message_in_xpath);
+    var settling = Date.now() < state.settleUntil;
+    rows.forEach(function (row) {
+        var item = serialize(row);
+        if (remember(rowKey(item)) && !settling && isAppended(row)) { push(item); }
+    });
+}
+function collectUnread() {
+    var list = first(document, sel.chat_list_xpath);
+    if (!list) { return; }
+    all(list, sel.chat_item_xpath).forEach(function (chat) {
+        var badge = first(chat, sel.unread_badge_xpath);
+        var titleNode = first(chat, sel.chat_title_xpath);
+        var title = titleNode ? titleNode.getAttribute('title') : null;
+        if (!title) { return; }
+        var count = badge ? (parseInt(badge.textContent, 10) || 1) : 0;
+        if (count > (state.unread[title] || 0)) {
+            push({kind: 'unread', chat: title, unread: count});
+        }
+        state.unread[title] = count;
+    });
+}
+
+var scheduled = false;
+var observer = new MutationObserver(function (mutations) {
+    if (!syncConversation()) {
+        mutations.forEach(function (mutation) {
+            mutation.addedNodes.forEach(collectRows);
+        });
+    }
+    state.lastRow = lastRenderedRow() || state.lastRow;
+    // Список чатов пересчитывается не чаще раза в кадр
+    if (!scheduled) {
+        scheduled = true;
+        setTimeout(function () { scheduled = false; collectUnread(); }, 100);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+// Уже отрисованные сообщения считаются прочитанными ранее и в буфер не попадают
+syncConversation();
+collectUnread();
+return true;
+"""
+
+# Забирает накопленное содержимое буфера; null — наблюдатель не установлен (страница перезагружена)
+DRAIN_OBSERVER_JS = """
+var state = window.__waIngest;
+if (!state) { return null; }
+var items = state.buffer;
+var dropped = state.dropped;
+state.buffer = [];
+state.dropped = 0;
+return {items: items, dropped: dropped};
+"""
+
+
+def to_message(item: dict) -> dict:
+    """
+    Переводит элемент буфера в формат сообщений get_new_messages_unread.
+    """
+    meta = parse_pre_plain_text(item.get("meta"))
+    message = {
+        "id": item.get("id"),
+        "type": item["type"],
+        "sender": meta.get("sender") or (item.get("sender") or "Unknown").rstrip(":").strip(),
+        "time": meta.get("time"),
+        "date": meta.get("date"),
+    }
+    if item["type"] == "text":
+        message["message"] = item.get("text", "")
+    elif item["type"] == "file":
+        message["file_name"] = item.get("file_name")
+        message["file_size"] = item.get("file_size")
+    return message
+
+
+class MessageObserver:
+    """
+    Приём входящих сообщений без обхода чатов: наблюдатель в странице копит новые
+    сообщения, а один вызов execute_script забирает их раз в interval секунд.
+    Сообщения видны только для открытого чата; по остальным чатам приходят события
+    роста счётчика непрочитанных (unread_chats), их можно дочитать get_new_messages_unread.
+    """
+
+    def __init__(self, session, interval: float = WA_OBSERVER_DRAIN_INTERVAL,
+                 buffer_limit: int = WA_OBSERVER_BUFFER_LIMIT):
+        self.session = session
+        self.interval = interval
+        self.buffer_limit = buffer_limit
+        self.dropped = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def install(self) -> bool:
+        driver = self.session.get_driver(create_if_missing=False, touch=False)
+        installed = driver.execute_script(INSTALL_OBSERVER_JS, SELECTOR_CONSTANTS, self.buffer_limit,
+                                          int(WA_OBSERVER_SETTLE * 1000))
+        if installed:
+            logger.info("Аккаунт %s: наблюдатель за сообщениями установлен", self.session.account)
+        return installed
+
+    def drain(self) -> dict:
+        """
+        Забирает накопленные события. Возвращает {"messages": {чат: [сообщения]}, "unread_chats": {чат: число}}.
+        """
+        driver = self.session.get_driver(create_if_missing=False, touch=False)
+        result = driver.execute_script(DRAIN_OBSERVER_JS)
+        if result is None:
+            # Страница перезагрузилась — наблюдатель ставится заново, пропущенное дочитывается обходом чатов
+            self.install()
+            result = {"items": [], "dropped": 0}
+        if result["dropped"]:
+            self.dropped += result["dropped"]
+            logger.warning("Аккаунт %s: буфер наблюдателя переполнен, пропущено событий: %d",
+                           self.session.account, result["dropped"])
+        messages = {}
+        unread_chats = {}
+        for item in result["items"]:
+            if item["kind"] == "unread":
+                unread_chats[item["chat"]] = item["unread"]
+            else:
+                messages.setdefault(item["chat"], []).append(to_message(item))
+        return {"messages": messages, "unread_chats": unread_chats}
+
+    def start(self, callback):
+        """
+        Запускает фоновый поток, который забирает события и передаёт непустые результаты в callback.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.install()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def _run(self, callback):
+        while not self._stop.wait(self.interval):
+            # Пока браузер выполняет команду из очереди сессии, буфер не читается
+            if not self.session.lock.acquire(timeout=self.interval):
+                continue
+            try:
+                result = None if self._stop.is_set() else self.drain()
+            except Exception as e:
+                logger.warning("Аккаунт %s: ошибка чтения наблюдателя: %s", self.session.account, e)
+                result = None
+            finally:
+                self.session.lock.release()
+            if result and (result["messages"] or result["unread_chats"]):
+                callback(result)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
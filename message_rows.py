@@ -0,0 +1,120 @@
+import re
+import logging
+from datetime import datetime
+
+from constants import SELECTOR_CONSTANTS
+
+logger = logging.getLogger(__name__)
+
+# Разбирает все строки сообщений за один вызов execute_script. Принимает список
+# элементов строк и SELECTOR_CONSTANTS, возвращает по объекту на строку в том же порядке.
+EXTRACT_ROWS_JS = """
+var rows = arguments[0];
+var sel = arguments[1];
+function first(ctx, xpath) {
+    return document.evaluate(xpath, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+return rows.map(function (row) {
+    var holder = row.closest('[data-id]');
+    var meta = first(row, sel.meta_xpath);
+    var senderNode = first(row, sel.sender_xpath);
+    var fileButton = first(row, sel.file_download_button_xpath);
+    var fileType = first(row, sel.file_type_xpath);
+    var fileSize = first(row, sel.file_size_xpath);
+    var text = first(row, sel.text_xpath);
+    var kind = 'text';
+    if (first(row, sel.audio_button_xpath)) {
+        kind = 'audio';
+    } else if (fileButton) {
+        kind = 'file';
+    } else if (first(row, sel.image_xpath)) {
+        kind = 'image';
+    }
+    return {
+        id: holder ? holder.getAttribute('data-id') : null,
+        kind: kind,
+        meta: meta ? meta.getAttribute('data-pre-plain-text') : null,
+        sender_label: senderNode ? senderNode.getAttribute('aria-label') : null,
+        download_title: fileButton ? fileButton.getAttribute('title') : null,
+        file_type: fileType ? (fileType.getAttribute('title') || fileType.innerText) : null,
+        file_size: fileSize ? fileSize.innerText : null,
+        text: text ? text.innerText.trim() : ''
+    };
+});
+"""
+
+_META_RE = re.compile(r"\[(\d{1,2}:\d{2}), (\d{1,2})\.(\d{1,2})\.(\d{4})\]\s*(.*?):?\s*$")
+
+
+def parse_pre_plain_text(meta: str) -> dict:
+    """
+    Разбирает атрибут data-pre-plain-text вида "[12:34, 18.10.2026] Имя: ".
+    Возвращает time, date (YYYY-MM-DD) и sender; при несовпадении формата — пустой словарь.
+    """
+    match = _META_RE.match((meta or "").strip())
+    if not match:
+        return {}
+    clock, day, month, year, sender = match.groups()
+    return {
+        "time": f"{clock}:00" if len(clock) == 5 else f"0{clock}:00",
+        "date": f"{year}-{int(month):02d}-{int(day):02d}",
+        "sender": sender.strip() or None,
+    }
+
+
+def row_timestamp(row: dict) -> float:
+    """
+    Время сообщения (epoch, с точностью до минуты) из data-pre-plain-text; None, если формат не распознан.
+    """
+    meta = parse_pre_plain_text(row.get("meta"))
+    if not meta:
+        return None
+    return datetime.strptime(f"{meta['date']} {meta['time']}", "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def rows_after_cursor(rows: list, cursor: dict, known_ids: set = frozenset()) -> list:
+    """
+    Индексы строк новее курсора чата ({"sent_at", "message_id"}), по порядку.
+    Если строка курсора есть среди rows, берутся строки после неё. Иначе — строки не старше
+    sent_at курсора: время в WhatsApp с точностью до минуты, поэтому строки той же минуты
+    отсеиваются по known_ids (уже сохранённые идентификаторы).
+    """
+    if cursor and cursor.get("message_id"):
+        for index, row in enumerate(rows):
+            if row.get("id") == cursor["message_id"]:
+                return [i for i in range(index + 1, len(rows)) if rows[i].get("id") not in known_ids]
+    selected = []
+    for index, row in enumerate(rows):
+        if row.get("id") and row["id"] in known_ids:
+            continue
+        timestamp = row_timestamp(row)
+        if cursor and cursor.get("sent_at") and timestamp is not None and timestamp < cursor["sent_at"]:
+            continue
+        selected.append(index)
+    return selected
+
+
+def parse_sender(row: dict) -> str:
+    """
+    Отправитель из data-pre-plain-text ("[12:34, 18.10.2026] Имя: "), иначе из aria-label.
+    """
+    meta = row.get("meta")
+    if meta:
+        meta_parts = meta.split("]")
+        if len(meta_parts) > 1:
+            meta_text = meta_parts[1].strip().rstrip(":")
+            sender = meta_text.split(",", 1)[1].strip() if "," in meta_text else meta_text
+            if sender:
+                return sender
+    if row.get("sender_label"):
+        return row["sender_label"].rstrip(":").strip()
+    return "Unknown"
+
+
+def extract_rows(driver, rows: list) -> list:
+    """
+    Поля всех строк сообщений одним запросом к chromedriver вместо нескольких find_element на строку.
+    """
+    if not rows:
+        return []
+    return driver.execute_script(EXTRACT_ROWS_JS, rows, SELECTOR_CONSTANTS) or []
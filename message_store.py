@@ -0,0 +1,204 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+from constants import DB_FILE
+
+# Поля сообщения, которые хранятся в отдельных столбцах; остальные — в payload
+_COLUMNS = ("type", "sender", "date", "time", "message", "file_name", "file_path", "file_type", "file_size")
+
+
+def message_hash(account: str, chat: str, message: dict) -> str:
+    """
+    Ключ для устранения дублей: идентификатор сообщения WhatsApp, если он известен,
+    иначе содержимое сообщения вместе с отправителем и временем.
+    """
+    if message.get("id"):
+        key = [account, chat, message["id"]]
+    else:
+        key = [account, chat] + [message.get(name) for name in ("sender", "date", "time", "type", "message", "file_name")]
+    return hashlib.sha256(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def message_timestamp(message: dict) -> float:
+    """
+    Время сообщения (epoch) из полей date и time; None, если их нет или формат другой.
+    """
+    try:
+        return datetime.strptime(f"{message['date']} {message['time']}", "%Y-%m-%d %H:%M:%S").timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class MessageStore:
+    """
+    Постоянное хранилище полученных сообщений WhatsApp в DB_FILE.
+    Сообщения записываются пачками в одной транзакции, дубли отбрасываются по хэшу.
+    Сообщения от наблюдателя в странице (observed) хранятся без медиа и не считаются
+    обработанными: обход непрочитанных дописывает их поверх и сдвигает курсор сам.
+    """
+
+    def __init__(self, db_file: str = DB_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account TEXT NOT NULL,
+                chat TEXT NOT NULL,
+                message_id TEXT,
+                content_hash TEXT NOT NULL,
+                sent_at REAL,
+                received_at REAL NOT NULL,
+                type TEXT,
+                sender TEXT,
+                date TEXT,
+                time TEXT,
+                message TEXT,
+                file_name TEXT,
+                file_path TEXT,
+                file_type TEXT,
+                file_size TEXT,
+                payload TEXT,
+                observed INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (account, content_hash)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(messages)")}
+        if "observed" not in columns:
+            self._conn.execute("ALTER TABLE messages ADD COLUMN observed INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages(account, chat, sent_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_account ON messages(account, sent_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_message_id ON messages(account, chat, message_id)")
+        # Курсор чата: время и идентификатор последнего обработанного входящего сообщения
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_cursors (
+                account TEXT NOT NULL,
+                chat TEXT NOT NULL,
+                sent_at REAL,
+                message_id TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account, chat)
+            )
+        """)
+        self._conn.commit()
+
+    def add_many(self, account: str, messages: dict, observed: bool = False) -> int:
+        """
+        Сохраняет сообщения {чат: [сообщения]} одной транзакцией. Возвращает число новых записей
+        (включая записи наблюдателя, заменённые полными данными обхода).
+        """
+        now = time.time()
+        rows = []
+        for chat, chat_messages in messages.items():
+            for message in chat_messages:
+                extra = {key: value for key, value in message.items() if key not in _COLUMNS and key != "id"}
+                rows.append((
+                    account, chat, message.get("id"), message_hash(account, chat, message),
+                    message_timestamp(message) or now, now,
+                    *(message.get(name) for name in _COLUMNS),
+                    json.dumps(extra, ensure_ascii=False) if extra else None,
+                    int(observed),
+                ))
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(f"""
+                INSERT INTO messages (account, chat, message_id, content_hash, sent_at, received_at,
+                                      {", ".join(_COLUMNS)}, payload, observed)
+                VALUES ({", ".join("?" * (len(_COLUMNS) + 8))})
+                ON CONFLICT(account, content_hash) DO UPDATE SET
+                    sent_at = excluded.sent_at,
+                    {", ".join(f"{name} = excluded.{name}" for name in _COLUMNS)},
+                    payload = excluded.payload,
+                    observed = 0
+                WHERE messages.observed = 1 AND excluded.observed = 0
+            """, rows)
+            return self._conn.total_changes - before
+
+    def known_ids(self, account: str, chat: str, message_ids: list) -> set:
+        """
+        Какие из идентификаторов сообщений чата уже обработаны обходом (записи наблюдателя не учитываются).
+        """
+        message_ids = [message_id for message_id in message_ids if message_id]
+        if not message_ids:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT message_id FROM messages
+                WHERE account = ? AND chat = ? AND observed = 0
+                      AND message_id IN ({", ".join("?" * len(message_ids))})
+            """, [account, chat, *message_ids]).fetchall()
+        return {row[0] for row in rows}
+
+    def get_cursor(self, account: str, chat: str) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sent_at, message_id FROM chat_cursors WHERE account = ? AND chat = ?", (account, chat)
+            ).fetchone()
+        return {"sent_at": row[0], "message_id": row[1]} if row else None
+
+    def set_cursor(self, account: str, chat: str, sent_at: float, message_id: str):
+        """
+        Сдвигает курсор чата вперёд. Курсор не откатывается на более раннее время;
+        если время сообщения неизвестно (изображение без data-pre-plain-text), меняется только
+        идентификатор, а прежняя граница по времени сохраняется.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO chat_cursors (account, chat, sent_at, message_id, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(account, chat) DO UPDATE SET
+                    sent_at = COALESCE(excluded.sent_at, chat_cursors.sent_at),
+                    message_id = excluded.message_id,
+                    updated_at = excluded.updated_at
+                WHERE chat_cursors.sent_at IS NULL OR excluded.sent_at IS NULL
+                      OR excluded.sent_at >= chat_cursors.sent_at
+            """, (account, chat, sent_at, message_id, time.time()))
+
+    def query(self, account: str, chat: str = None, since: float = None, after_id: int = None,
+              limit: int = 100) -> dict:
+        """
+        Страница сообщений по возрастанию времени. after_id — курсор из next_cursor предыдущей страницы.
+        """
+        conditions = ["account = ?"]
+        params = [account]
+        if chat is not None:
+            conditions.append("chat = ?")
+            params.append(chat)
+        if since is not None:
+            conditions.append("sent_at >= ?")
+            params.append(since)
+        if after_id is not None:
+            # Курсор: (sent_at, id) последней строки предыдущей страницы
+            conditions.append("(sent_at, id) > (SELECT sent_at, id FROM messages WHERE id = ?)")
+            params.append(after_id)
+        params.append(limit + 1)
+        with self._lock:
+            cursor = self._conn.execute(f"""
+                SELECT id, chat, message_id, sent_at, payload, {", ".join(_COLUMNS)}
+                FROM messages
+                WHERE {" AND ".join(conditions)}
+                ORDER BY sent_at, id
+                LIMIT ?
+            """, params)
+            rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        messages = []
+        for row in rows[:limit]:
+            message = {"store_id": row[0], "chat": row[1], "id": row[2], "sent_at": row[3]}
+            message.update({name: value for name, value in zip(_COLUMNS, row[5:]) if value is not None})
+            if row[4]:
+                message.update(json.loads(row[4]))
+            messages.append(message)
+        return {"messages": messages, "next_cursor": messages[-1]["store_id"] if has_more else None}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from constants import (PARSER_WAIT_TIMEOUT, PARSER_MIN_ACTION_INTERVAL, PARSER_NETWORK_IDLE_TIME,
+                       PARSER_MAX_RESUMES_PER_MINUTE)
+
+logger = logging.getLogger(__name__)
+
+
+class PageWaiter:
+    """
+    Ожидания по условиям вместо фиксированных пауз: элемент появился, сеть затихла,
+    изменилось число вкладок. Минимальный интервал между действиями сохраняется,
+    чтобы не нагружать сайт, но не растягивается сверх него.
+    """
+
+    def __init__(self, driver, timeout: float = PARSER_WAIT_TIMEOUT,
+                 min_interval: float = PARSER_MIN_ACTION_INTERVAL):
+        self.driver = driver
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self._last_action = {}
+
+    def polite(self, key: str = "action", interval: float = None):
+        """
+        Выдерживает минимальный интервал с прошлого действия того же типа.
+        """
+        interval = self.min_interval if interval is None else interval
+        elapsed = time.monotonic() - self._last_action.get(key, 0)
+        if elapsed < interval:
+            time.sleep(interval - elapsed)
+        self._last_action[key] = time.monotonic()
+
+    def until(self, condition, timeout: float = None, message: str = ""):
+        return WebDriverWait(self.driver, self.timeout if timeout is None else timeout,
+                             poll_frequency=0.1).until(condition, message)
+
+    def element(self, locator: tuple, clickable: bool = False, timeout: float = None):
+        condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        return self.until(condition(locator), timeout)
+
+    def optional_element(self, locator: tuple, clickable: bool = False, timeout: float = None):
+        """
+        То же, что element, но при отсутствии элемента возвращает None.
+        """
+        try:
+            return self.element(locator, clickable, timeout)
+        except TimeoutException:
+            return None
+
+    def document_ready(self, timeout: float = None):
+        self.until(lambda d: d.execute_script("return document.readyState") == "complete", timeout)
+
+    def network_idle(self, idle_time: float = PARSER_NETWORK_IDLE_TIME, timeout: float = None):
+        """
+        Ждёт, пока документ загружен и в течение idle_time не появилось новых сетевых запросов.
+        Число запросов берётся из Resource Timing API браузера.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        last_count = -1
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
+            state, count = self.driver.execute_script(
+                "return [document.readyState, performance.getEntriesByType('resource').length];")
+            now = time.monotonic()
+            if state != "complete" or count != last_count:
+                last_count = count
+                stable_since = now
+            elif now - stable_since >= idle_time:
+                return
+            time.sleep(0.1)
+        logger.debug("Сеть не затихла за отведённое время, продолжаем")
+
+    def new_window(self, previous_handles: list, timeout: float = None) -> str:
+        """
+        Ждёт открытия новой вкладки и возвращает её дескриптор.
+        """
+        self.until(lambda d: len(d.window_handles) > len(previous_handles), timeout)
+        new_handles = [h for h in self.driver.window_handles if h not in previous_handles]
+        return new_handles[-1]
+
+    def staleness(self, element, timeout: float = None):
+        self.until(EC.staleness_of(element), timeout)
+
+
+class RateLimiter:
+    """
+    Общий для нескольких потоков ограничитель частоты: запросы равномерно
+    распределяются во времени, не чаще per_minute в минуту.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Один ограничитель на процесс: его делят исполнители и переходы по выдаче всех одновременных запусков,
+# поэтому суммарная частота запросов к сайту не растёт с числом заданий
+site_rate_limiter = RateLimiter(PARSER_MAX_RESUMES_PER_MINUTE)
+
+
+class StepTimer:
+    """
+    Замеряет длительность шагов парсера и пишет её в лог, чтобы было видно, куда уходит время.
+    """
+
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+        self.totals = {}
+        self.counts = {}
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.log.info("Шаг %s: %.2f сек", name, elapsed)
+
+    def summary(self) -> str:
+        lines = [
+            f"{name}: всего {total:.1f} сек, раз {self.counts[name]}, в среднем {total / self.counts[name]:.2f} сек"
+            for name, total in sorted(self.totals.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,68 @@
+import logging
+
+from selenium import webdriver
+
+from constants import PARSER_BROWSER_MODE, PARSER_LEAN_WINDOW_SIZE
+from utils import process_tree_stats
+
+logger = logging.getLogger(__name__)
+
+# Настройки Firefox для экономного режима: парсеру нужны только текст и атрибут src фото
+LEAN_PREFERENCES = {
+    "permissions.default.image": 2,                  # не загружать изображения
+    "media.autoplay.default": 5,                     # блокировать автовоспроизведение
+    "media.autoplay.blocking_policy": 2,
+    "gfx.downloadable_fonts.enabled": False,         # не загружать веб-шрифты
+    "browser.display.use_document_fonts": 0,
+    "privacy.trackingprotection.enabled": True,      # блокировать трекеры
+    "browser.cache.disk.enable": False,              # дисковый кэш не нужен короткоживущему профилю
+    "browser.cache.offline.enable": False,
+    "browser.sessionhistory.max_total_viewers": 0,   # не держать страницы в памяти для «Назад»
+    "browser.sessionstore.resume_from_crash": False,
+    "dom.ipc.processCount": 1,                       # один контентный процесс вместо нескольких
+    "datareporting.healthreport.uploadEnabled": False,
+    "toolkit.telemetry.enabled": False,
+}
+
+
+def create_parser_driver(mode: str = PARSER_BROWSER_MODE) -> webdriver.Firefox:
+    """
+    Создаёт Firefox для парсера в режиме "lean" (без окна, картинок, шрифтов и трекеров)
+    или "full" (обычное окно 1920x1080, как раньше).
+    """
+    options = webdriver.FirefoxOptions()
+    options.set_preference("dom.webdriver.enabled", False)
+    options.set_preference("useAutomationExtension", False)
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    if mode == "lean":
+        options.add_argument("-headless")
+        for name, value in LEAN_PREFERENCES.items():
+            options.set_preference(name, value)
+
+    driver = webdriver.Firefox(options=options)
+    if mode == "lean":
+        driver.set_window_size(*PARSER_LEAN_WINDOW_SIZE)
+    else:
+        driver.set_window_size(1920, 1080)
+    return driver
+
+
+def page_load_time(driver) -> float:
+    """
+    Время загрузки текущей страницы в секундах по Navigation Timing API.
+    """
+    duration = driver.execute_script(
+        "var nav = performance.getEntriesByType('navigation')[0];"
+        "return nav ? nav.duration : null;")
+    return (duration or 0) / 1000
+
+
+def browser_stats(driver) -> dict:
+    """
+    Память и процессорное время geckodriver и всех процессов Firefox, запущенных им.
+    """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        pid = None
+    return process_tree_stats(pid)
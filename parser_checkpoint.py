@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+
+from constants import PARSER_RUNS_DIR
+from candidate_journal import CandidateJournal
+
+logger = logging.getLogger(__name__)
+
+
+class ParserCheckpoint:
+    """
+    Контрольная точка запуска парсера для тройки (владелец, период, набор фильтров).
+    Владелец — чат Telegram, поэтому незавершённые запуски разных пользователей не пересекаются.
+    Хранит номер текущей страницы выдачи и журнал уже собранных кандидатов,
+    по которому восстанавливается множество обработанных анкет.
+    """
+
+    def __init__(self, period: str, filters: dict, owner=None, runs_dir: str = PARSER_RUNS_DIR):
+        self.period = period
+        self.filters = filters
+        self.owner = owner
+        key = hashlib.sha1(json.dumps({"owner": owner, "period": period, "filters": filters},
+                                      sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+        self.run_dir = os.path.join(runs_dir, f"{period}_{key}")
+        self.state_file = os.path.join(self.run_dir, "checkpoint.json")
+        self.journal_file = os.path.join(self.run_dir, "candidates.jsonl")
+        self.snapshot_file = os.path.join(self.run_dir, "candidates.xlsx")
+        self.listing_file = os.path.join(self.run_dir, "listing.json")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.state_file)
+
+    def load(self) -> dict:
+        if self.exists():
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning("Контрольная точка %s повреждена, запуск начнётся сначала: %s", self.state_file, e)
+        return {"page": 1, "period": self.period, "filters": self.filters, "started_at": time.time()}
+
+    def save_page(self, page: int):
+        """
+        Запоминает страницу выдачи, с которой нужно продолжить после сбоя.
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        state = self.load()
+        state["page"] = page
+        state["updated_at"] = time.time()
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def load_listing(self) -> dict:
+        """
+        Ссылки на анкеты, уже собранные со страниц выдачи: {"pages": [[url, ...], ...], "complete": bool}.
+        """
+        if os.path.exists(self.listing_file):
+            try:
+                with open(self.listing_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning("Список ссылок %s повреждён, выдача будет собрана заново: %s", self.listing_file, e)
+        return {"pages": [], "complete": False}
+
+    def save_listing(self, pages: list, complete: bool):
+        os.makedirs(self.run_dir, exist_ok=True)
+        tmp_file = self.listing_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages, "complete": complete}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.listing_file)
+
+    def seen_resumes(self) -> set:
+        return {record["resume_url"] for record in CandidateJournal.read(self.journal_file)
+                if record.get("resume_url")}
+
+    def summary(self) -> dict:
+        state = self.load()
+        return {"page": state.get("page", 1), "collected": len(CandidateJournal.read(self.journal_file)),
+                "updated_at": state.get("updated_at")}
+
+    def clear(self):
+        shutil.rmtree(self.run_dir, ignore_errors=True)
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+
+from constants import PARSER_PROGRESS_INTERVAL, PARSER_METRICS_FILE
+
+logger = logging.getLogger(__name__)
+
+PHASE_TITLES = {
+    "session": "вход на сайт",
+    "filters": "настройка фильтров",
+    "collect": "сбор анкет",
+    "done": "завершено",
+}
+
+
+class ProgressReporter:
+    """
+    Прогресс запуска парсера. Поток парсера вызывает publish, снимки состояния
+    передаются в asyncio-очередь цикла бота, где их отображает stream_progress.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._collect_started = None
+        self._state = {
+            "phase": "session",
+            "page": 0,
+            "discovered": 0,
+            "processed": 0,
+            "skipped": 0,
+        }
+
+    def publish(self, **changes):
+        """
+        Обновляет счётчики (page, discovered, processed, skipped, phase) и отправляет снимок.
+        Безопасно вызывать из любого потока.
+        """
+        with self._lock:
+            self._state.update(changes)
+            if self._state["phase"] == "collect" and self._collect_started is None:
+                self._collect_started = time.time()
+            event = self._snapshot()
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def increment(self, name: str, value: int = 1):
+        # Чтение и запись под одной блокировкой: счётчики увеличивают параллельные потоки анкет
+        with self._lock:
+            self._state[name] += value
+            event = self._snapshot()
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        now = time.time()
+        event = dict(self._state, time=now, elapsed=now - self.started_at, rate_per_minute=0.0, eta=None)
+        if self._collect_started and event["processed"]:
+            collect_elapsed = max(now - self._collect_started, 1e-6)
+            event["rate_per_minute"] = event["processed"] / collect_elapsed * 60
+            remaining = event["discovered"] - event["processed"]
+            if remaining > 0:
+                # Оценка только по уже найденным анкетам: общее число страниц выдачи заранее неизвестно
+                event["eta"] = remaining / event["rate_per_minute"] * 60
+        return event
+
+    def close(self):
+        """
+        Завершает поток событий. Итоговые показатели дописываются в PARSER_METRICS_FILE
+        для оценки пропускной способности.
+        """
+        event = self.snapshot()
+        try:
+            os.makedirs(os.path.dirname(PARSER_METRICS_FILE), exist_ok=True)
+            with open(PARSER_METRICS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("Не удалось записать метрики парсера: %s", e)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} ч {seconds % 3600 // 60} мин"
+    if seconds >= 60:
+        return f"{seconds // 60} мин {seconds % 60} сек"
+    return f"{seconds} сек"
+
+
+def render_progress(event: dict, final: bool = False) -> str:
+    lines = [
+        f"{'🏁' if final else '🔄'} Парсер: {PHASE_TITLES.get(event['phase'], event['phase'])}",
+        f"Страница выдачи: {event['page']}",
+        f"Найдено новых анкет: {event['discovered']}",
+        f"Обработано: {event['processed']}, пропущено известных: {event['skipped']}",
+        f"Скорость: {event['rate_per_minute']:.1f} анкет/мин",
+        f"Прошло: {_format_duration(event['elapsed'])}",
+    ]
+    if event["eta"] is not None and not final:
+        lines.append(f"Осталось по найденным анкетам: ~{_format_duration(event['eta'])}")
+    return "\n".join(lines)
+
+
+async def stream_progress(bot, chat_id: int, reporter: ProgressReporter,
+                          interval: float = PARSER_PROGRESS_INTERVAL):
+    """
+    Показывает прогресс одним сообщением, редактируя его не чаще раза в interval секунд.
+    Промежуточные снимки между обновлениями отбрасываются — важно только последнее состояние.
+    """
+    message = await bot.send_message(chat_id, render_progress(reporter.snapshot()))
+    shown_text = message.text
+    last_edit = time.monotonic()
+    latest = None
+    finished = False
+    while not finished:
+        timeout = max(0.0, interval - (time.monotonic() - last_edit))
+        try:
+            event = await asyncio.wait_for(reporter.queue.get(), timeout=timeout if latest else None)
+            if event is None:
+                finished = True
+            else:
+                latest = event
+                if time.monotonic() - last_edit < interval:
+                    continue
+        except asyncio.TimeoutError:
+            pass
+
+        event = reporter.snapshot() if finished else latest
+        text = render_progress(event, final=finished)
+        latest = None
+        if text == shown_text:
+            continue
+        try:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message.message_id)
+            shown_text = text
+        except Exception as e:
+            logger.debug("Не удалось обновить сообщение о прогрессе: %s", e)
+        last_edit = time.monotonic()
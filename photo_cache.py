@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+
+from constants import PHOTO_CACHE_DIR, PHOTO_CACHE_MAX_BYTES, PHOTO_CACHE_MAX_AGE, PHOTO_CACHE_REVALIDATE_AFTER
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoCache:
+    """
+    Дисковый кэш фотографий: индекс по URL, содержимое хранится по sha256.
+    Для каждой записи сохраняются ETag/Last-Modified для условных запросов.
+    Вытеснение — по возрасту последнего обращения и по общему размеру (LRU).
+    Параллельные задания парсера используют один экземпляр (shared_photo_cache), иначе
+    каждое перезаписывало бы индекс и удаляло файлы, сохранённые другим.
+    """
+
+    def __init__(self, cache_dir: str = PHOTO_CACHE_DIR, max_bytes: int = PHOTO_CACHE_MAX_BYTES,
+                 max_age: int = PHOTO_CACHE_MAX_AGE, revalidate_after: int = PHOTO_CACHE_REVALIDATE_AFTER):
+        self.cache_dir = cache_dir
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.revalidate_after = revalidate_after
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Индекс кэша фотографий повреждён, кэш будет пересоздан: %s", e)
+            return {}
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_dir, digest[:2], digest)
+
+    def lookup(self, url: str) -> dict:
+        """
+        Возвращает запись кэша для URL или None, если содержимого нет на диске.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and not os.path.exists(self._blob_path(entry["sha256"])):
+                del self._index[url]
+                entry = None
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["validated_at"] < self.revalidate_after
+
+    def validation_headers(self, entry: dict) -> dict:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, url: str, revalidated: bool = False) -> bytes:
+        """
+        Читает содержимое из кэша и отмечает обращение (попадание).
+        Возвращает None, если запись успели вытеснить после lookup().
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return None
+            try:
+                with open(self._blob_path(entry["sha256"]), "rb") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                del self._index[url]
+                return None
+            now = time.time()
+            entry["accessed_at"] = now
+            if revalidated:
+                entry["validated_at"] = now
+                self.revalidated += 1
+            self.hits += 1
+            return content
+
+    def store(self, url: str, content: bytes, content_type: str, etag: str = None, last_modified: str = None):
+        """
+        Сохраняет загруженное содержимое (промах кэша).
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+        # Файл пишется под блокировкой, чтобы evict() не удалил его до появления записи в индексе
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            self.misses += 1
+            self._index[url] = {
+                "sha256": digest,
+                "size": len(content),
+                "content_type": content_type,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": now,
+                "validated_at": now,
+                "accessed_at": now,
+            }
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def evict(self) -> int:
+        """
+        Удаляет устаревшие записи и самые давно использованные, пока кэш больше max_bytes.
+        Файлы без записей удаляются, только если они старше начала прохода
+        (их мог только что сохранить другой процесс). Возвращает число удалённых файлов содержимого.
+        """
+        with self._lock:
+            now = time.time()
+            for url in [url for url, entry in self._index.items() if now - entry["accessed_at"] > self.max_age]:
+                del self._index[url]
+
+            # Размер считаем по уникальному содержимому: один файл может соответствовать нескольким URL
+            blob_access = {}
+            blob_size = {}
+            for entry in self._index.values():
+                digest = entry["sha256"]
+                blob_access[digest] = max(blob_access.get(digest, 0), entry["accessed_at"])
+                blob_size[digest] = entry["size"]
+            total = sum(blob_size.values())
+            for digest in sorted(blob_access, key=blob_access.get):
+                if total <= self.max_bytes:
+                    break
+                total -= blob_size[digest]
+                for url in [url for url, entry in self._index.items() if entry["sha256"] == digest]:
+                    del self._index[url]
+
+            referenced = {entry["sha256"] for entry in self._index.values()}
+            removed = 0
+            for root, _, files in os.walk(self.blobs_dir):
+                for name in files:
+                    if name not in referenced:
+                        path = os.path.join(root, name)
+                        try:
+                            if os.path.getmtime(path) >= now:
+                                continue
+                            os.remove(path)
+                            removed += 1
+                        except FileNotFoundError:
+                            pass
+                        except OSError as e:
+                            logger.warning("Не удалось удалить файл кэша %s: %s", name, e)
+            return removed
+
+    def save(self):
+        """
+        Атомарно записывает индекс на диск.
+        """
+        with self._lock:
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp_file, self.index_file)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "entries": len(self._index),
+                "bytes": sum({e["sha256"]: e["size"] for e in self._index.values()}.values()),
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_photo_cache() -> PhotoCache:
+    """
+    Общий для процесса кэш фотографий с настройками из constants.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = PhotoCache()
+        return _shared_cache
@@ -0,0 +1,61 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from constants import RESUME_SELECTORS, RESUME_FIELD_SELECTORS
+
+MISSING_VALUE = "не указано"
+
+# Возвращает значения всех полей анкеты за один запрос к браузеру.
+# Отсутствующее поле даёт null и не требует ожидания.
+EXTRACT_FIELDS_JS = """
+var fields = arguments[0];
+var result = {};
+for (var name in fields) {
+    var element = document.querySelector(fields[name].css);
+    var value = element ? element[fields[name].property] : null;
+    result[name] = (typeof value === 'string') ? value.trim() : null;
+}
+return result;
+"""
+
+# Ссылка на анкету для заголовка в выдаче (аргумент — элемент заголовка)
+RESUME_LINK_JS = """
+var link = arguments[0].closest('a') || arguments[0].querySelector('a');
+return link ? link.href : null;
+"""
+
+
+def wait_resume_rendered(waiter, timeout: float = 10) -> bool:
+    """
+    Ждёт, пока на странице анкеты появится заголовок или кнопка контактов.
+    """
+    try:
+        waiter.until(EC.any_of(
+            EC.presence_of_element_located((By.XPATH, RESUME_SELECTORS["resume_title_xpath"])),
+            EC.presence_of_element_located((By.XPATH, RESUME_SELECTORS["show_contacts_xpath"])),
+        ), timeout)
+        return True
+    except TimeoutException:
+        return False
+
+
+def reveal_contacts(driver, waiter, timeout: float = 5) -> bool:
+    """
+    Нажимает «Показать контакты», если кнопка есть, и ждёт появления телефона.
+    Отсутствие кнопки не стоит ожидания.
+    """
+    buttons = driver.find_elements(By.XPATH, RESUME_SELECTORS["show_contacts_xpath"])
+    if not buttons:
+        return False
+    buttons[0].click()
+    waiter.optional_element((By.XPATH, RESUME_SELECTORS["phone_link_xpath"]), timeout=timeout)
+    return True
+
+
+def extract_resume(driver) -> dict:
+    """
+    Извлекает ФИО, телефон и ссылку на фото из отрисованной анкеты одним вызовом execute_script.
+    """
+    values = driver.execute_script(EXTRACT_FIELDS_JS, RESUME_FIELD_SELECTORS) or {}
+    return {name: values.get(name) or MISSING_VALUE for name in RESUME_FIELD_SELECTORS}
@@ -0,0 +1,158 @@
+import sys
+import logging
+from contextlib import nullcontext
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from constants import RESUME_SELECTORS
+
+logger = logging.getLogger(__name__)
+
+# Заголовок анкеты в выдаче; совпадает с RESUME_SELECTORS["listing_title_css"] (div[class*='resume-data__title'])
+LISTING_TITLE_TAG = "div"
+LISTING_TITLE_CLASS = "resume-data__title"
+
+# Ссылки на все анкеты текущей страницы выдачи за один вызов; null — если у заголовка нет ссылки
+LISTING_LINKS_JS = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (title) {
+    var link = title.closest('a') || title.querySelector('a');
+    return link ? link.href : null;
+});
+"""
+
+
+class _ListingLinksParser(HTMLParser):
+    """
+    Находит ссылки на анкеты в сохранённом HTML страницы выдачи тем же правилом,
+    что и LISTING_LINKS_JS: для каждого div, в классе которого есть resume-data__title,
+    берётся ближайший элемент <a> среди самого заголовка и его предков (closest),
+    иначе первый <a> внутри заголовка. Как и link.href, <a> без href даёт пустую строку.
+    """
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+        self.links = []
+        self._stack = []        # [(тег, ссылка, если тег — <a>, иначе None)]
+        self._pending = set()   # индексы заголовков, ждущих первой ссылки внутри себя
+        self._pending_depth = {}
+
+    def _href(self, attrs: dict) -> str:
+        href = attrs.get("href")
+        return urljoin(self.base_url, href) if href is not None else ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        link = self._href(attrs) if tag == "a" else None
+        if link is not None:
+            # Первая ссылка внутри заголовков, у которых нет ссылки-предка
+            for index in self._pending:
+                self.links[index] = link
+            self._pending.clear()
+        self._stack.append((tag, link))
+        if tag == LISTING_TITLE_TAG and LISTING_TITLE_CLASS in (attrs.get("class") or ""):
+            closest = next((entry[1] for entry in reversed(self._stack) if entry[1] is not None), None)
+            self.links.append(closest)
+            if closest is None:
+                self._pending.add(len(self.links) - 1)
+                self._pending_depth[len(self.links) - 1] = len(self._stack)
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+        # Заголовок закрыт без ссылки внутри — остаётся None
+        for title in [title for title in self._pending if self._pending_depth[title] > len(self._stack)]:
+            self._pending.discard(title)
+
+
+def parse_listing_html(html: str, base_url: str = "https://hr-mnenie.com/") -> list:
+    """
+    Извлекает ссылки на анкеты из HTML страницы выдачи (например, сохранённой для отладки).
+    """
+    parser = _ListingLinksParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.links
+
+
+def harvest_page(driver) -> list:
+    """
+    Ссылки на анкеты текущей страницы выдачи одним вызовом execute_script.
+    """
+    return driver.execute_script(LISTING_LINKS_JS, RESUME_SELECTORS["listing_title_css"]) or []
+
+
+class ListingHarvester:
+    """
+    Проходит по страницам выдачи и собирает ссылки на анкеты, не открывая их.
+    Собранные страницы сохраняются в контрольной точке, поэтому продолженный запуск
+    не листает выдачу заново. Если у заголовков нет ссылок, сбор останавливается
+    на этой странице и выставляется links_missing.
+    """
+
+    def __init__(self, driver, checkpoint, open_next_page, timer=None):
+        self.driver = driver
+        self.checkpoint = checkpoint
+        self.open_next_page = open_next_page
+        self.timer = timer
+        self.links_missing = False
+        self.page = 1
+
+    def _step(self, name):
+        return self.timer.step(name) if self.timer else nullcontext()
+
+    def pages(self):
+        """
+        Генератор списков ссылок по страницам, по порядку выдачи.
+        """
+        listing = self.checkpoint.load_listing()
+        # Страница, до которой дошёл прошлый запуск (в том числе переходом по заголовкам);
+        # пока браузер до неё не дошёл, номер в контрольной точке не перезаписывается
+        saved_page = self.checkpoint.load().get("page", 1)
+        for urls in listing["pages"]:
+            yield urls
+        if listing["complete"]:
+            return
+
+        self.page = 1
+        with self._step("skip_to_page"):
+            while self.page <= len(listing["pages"]) and self.open_next_page():
+                self.page += 1
+        if self.page <= len(listing["pages"]):
+            # Выдача стала короче, чем при прошлом запуске
+            self.checkpoint.save_listing(listing["pages"], complete=True)
+            return
+        if self.page > 1:
+            logger.info(f"Продолжение сбора ссылок со страницы {self.page}")
+
+        while True:
+            if self.page >= saved_page:
+                self.checkpoint.save_page(self.page)
+            with self._step("harvest_page"):
+                urls = harvest_page(self.driver)
+            if None in urls:
+                logger.warning(f"На странице {self.page} у заголовков анкет нет ссылок, сбор ссылок остановлен")
+                self.links_missing = True
+                return
+            listing["pages"].append(urls)
+            self.checkpoint.save_listing(listing["pages"], complete=False)
+            yield urls
+            with self._step("next_page"):
+                has_next_page = bool(urls) and self.open_next_page()
+            if not has_next_page:
+                self.checkpoint.save_listing(listing["pages"], complete=True)
+                return
+            self.page += 1
+
+
+if __name__ == "__main__":
+    # Проверка на сохранённой странице: python resume_harvester.py listing.html
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        for link in parse_listing_html(f.read()):
+            print(link)
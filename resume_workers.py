@@ -0,0 +1,64 @@
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from page_waits import PageWaiter, site_rate_limiter
+from parser_browser import page_load_time
+from resume_extractor import wait_resume_rendered, reveal_contacts, extract_resume
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeWorkerPool:
+    """
+    Несколько браузеров с cookies основной сессии, которые параллельно открывают
+    анкеты по прямым ссылкам. Частота открытия анкет ограничена общим для всех запусков
+    site_rate_limiter.
+    """
+
+    def __init__(self, session, workers: int, rate_limiter=site_rate_limiter):
+        self.rate_limiter = rate_limiter
+        self._drivers = queue.Queue()
+        self._all_drivers = []
+        try:
+            for _ in range(workers):
+                driver = session.spawn_worker_driver()
+                self._all_drivers.append(driver)
+                self._drivers.put(driver)
+        except Exception:
+            self.close()
+            raise
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-worker")
+
+    def _fetch(self, url: str) -> dict:
+        driver = self._drivers.get()
+        try:
+            waiter = PageWaiter(driver)
+            self.rate_limiter.acquire()
+            driver.get(url)
+            if not wait_resume_rendered(waiter):
+                logger.warning("Анкета не отрисовалась: %s", url)
+            load_time = page_load_time(driver)
+            if not reveal_contacts(driver, waiter):
+                logger.info("Кнопка 'Показать контакты' не найдена: %s", url)
+            resume = extract_resume(driver)
+            resume["load_time"] = load_time
+            return resume
+        finally:
+            self._drivers.put(driver)
+
+    def submit(self, url: str):
+        """
+        Ставит анкету в очередь на загрузку и возвращает Future с результатом.
+        """
+        return self._executor.submit(self._fetch, url)
+
+    def close(self):
+        if hasattr(self, "_executor"):
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        for driver in self._all_drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.warning("Ошибка при закрытии браузера-исполнителя: %s", e)
+        self._all_drivers = []
@@ -1,26 +1,36 @@
 import os
-import uuid
-import time
 
-def get_unique_filename(prefix: str, original_name: str, default_ext: str) -> str:
+def process_tree_stats(pid: int) -> dict:
     """
-    Генерирует уникальное имя файла с сохранением расширения.
+    Суммарные RSS (в байтах) и процессорное время (в секундах) процесса и всех его потомков.
+    Читает /proc, поэтому работает только в Linux; в остальных системах возвращает нули.
     """
-    _, ext = os.path.splitext(original_name)
-    if not ext:
-        ext = default_ext
-    return f"{prefix}_{uuid.uuid4()}{ext}"
-
-def wait_for_new_file(download_dir: str, existing_files: set, timeout_sec: int = 20) -> str:
-    """
-    Ожидает появления нового файла в указанной директории, отличного от списка existing_files.
-    """
-    end_time = time.time() + timeout_sec
-    while time.time() < end_time:
-        current_files = set(os.listdir(download_dir))
-        diff = current_files - existing_files
-        for candidate in diff:
-            if not candidate.endswith(".crdownload"):
-                return candidate
-        time.sleep(0.5)
-    return None
+    stats = {"rss_bytes": 0, "cpu_seconds": 0.0, "processes": 0}
+    if not pid or not os.path.isdir("/proc"):
+        return stats
+    children = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry.name))
+        except (OSError, IndexError, ValueError):
+            continue
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # После имени процесса: utime и stime — 12-е и 13-е поля, rss (в страницах) — 22-е
+        stats["cpu_seconds"] += (int(fields[11]) + int(fields[12])) / clock_ticks
+        stats["rss_bytes"] += int(fields[21]) * page_size
+        stats["processes"] += 1
+        pending.extend(children.get(current, []))
+    return stats
@@ -4,6 +4,7 @@ import time
 import re
 import threading
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 
 from selenium import webdriver
@@ -13,17 +14,30 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import (WebDriverException, TimeoutException, NoSuchElementException,
+                                        SessionNotCreatedException)
 from selenium.webdriver.common.keys import Keys
 
 
-from constants import ACCOUNTS_DIR, MAX_BROWSER_WAIT, DRIVER_WAIT_TIMEOUT, DOWNLOAD_TIMEOUT, SELECTOR_CONSTANTS
-from utils import get_unique_filename, wait_for_new_file
+from constants import (ACCOUNTS_DIR, MAX_BROWSER_WAIT, DRIVER_WAIT_TIMEOUT, DOWNLOAD_TIMEOUT, SELECTOR_CONSTANTS,
+                       WA_PREWARM_ACCOUNTS, WA_UNREAD_ANCHOR_TIMEOUT, WA_FALLBACK_MAX_ROWS, WA_BLOB_FETCH,
+                       WA_MAX_LIVE_DRIVERS, WA_DRIVER_QUEUE_TIMEOUT, WA_SESSION_IDLE_TIMEOUT, WA_EVICT_MIN_IDLE,
+                       WA_PRIORITY_BULK, WA_OBSERVER_BUFFER_LIMIT)
+from command_queue import CommandQueue
+from download_watcher import DownloadWatcher
+from utils import process_tree_stats
+from media_fetch import fetch_row_media, media_extension
+from media_store import MediaStore
+from driver_binary import resolve_chromedriver
+from message_observer import MessageObserver
+from message_rows import extract_rows, parse_sender, parse_pre_plain_text, row_timestamp, rows_after_cursor
+from message_store import MessageStore
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+message_store = MessageStore()
+
 
 
 class WhatsAppSession:
@@ -36,6 +50,19 @@ class WhatsAppSession:
         self.cookies_file = os.path.join(self.profile_path, "cookies.pkl")
         self.driver = None
         self.lock = threading.RLock()
+        # Все команды к браузеру выполняются по очереди в потоке сессии, см. WhatsAppManager.run
+        self.commands = CommandQueue(f"whatsapp-{account}", self.lock)
+        self.startup_timings = {}
+        self.observer = None
+        # Сообщения, забранные фоновым потоком наблюдателя и ещё не отданные через get_observed_messages
+        self._observed = deque(maxlen=WA_OBSERVER_BUFFER_LIMIT)
+        self._observed_unread = {}
+        self._observed_lock = threading.Lock()
+        self.download_watcher = None
+        self.media_store = None
+        self.has_slot = False       # Место в пуле браузеров WhatsAppManager занято этой сессией
+        self.suspended = False      # Браузер закрыт из-за простоя, при обращении запускается снова
+        self.last_used = time.monotonic()
 
     def create_driver(self) -> webdriver.Chrome:
         options = Options()
@@ -51,35 +78,97 @@ class WhatsAppSession:
         options.add_experimental_option("prefs", prefs)
         # Для headless-режима можно раскомментировать:
         # options.add_argument("--headless")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        start = time.perf_counter()
+        driver_path = resolve_chromedriver()
+        resolved = time.perf_counter()
+        try:
+            driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        except SessionNotCreatedException:
+            # Chrome обновился и закреплённый драйвер ему не подходит
+            logger.warning("chromedriver не подходит к установленному Chrome, драйвер будет получен заново")
+            driver_path = resolve_chromedriver(refresh=True)
+            resolved = time.perf_counter()
+            driver = webdriver.Chrome(service=Service(driver_path), options=options)
         driver.maximize_window()
+        self.startup_timings = {
+            "resolve_driver": resolved - start,
+            "launch_browser": time.perf_counter() - resolved,
+        }
         return driver
 
-    def get_driver(self, create_if_missing: bool = False) -> webdriver.Chrome:
+    def prewarm(self) -> dict:
+        """
+        Заранее запускает Chrome и открывает WhatsApp Web, чтобы /open занимал
+        только время проверки входа.
+        """
+        with self.lock:
+            driver = self.get_driver(create_if_missing=True)
+            start = time.perf_counter()
+            driver.get("https://web.whatsapp.com/")
+            self.startup_timings["page_load"] = time.perf_counter() - start
+            self.startup_timings["prewarmed"] = True
+            logger.info("Аккаунт %s: Chrome запущен заранее, %s", self.account, self.startup_timings)
+            return dict(self.startup_timings)
+
+    def get_media_store(self) -> MediaStore:
         with self.lock:
+            if self.media_store is None:
+                self.media_store = MediaStore(self.account, os.path.join(self.profile_path, "media"))
+                self.media_store.start_retention()
+            return self.media_store
+
+    def get_download_watcher(self) -> DownloadWatcher:
+        with self.lock:
+            if self.download_watcher is None:
+                self.download_watcher = DownloadWatcher(self.download_dir)
+            return self.download_watcher
+
+    def get_driver(self, create_if_missing: bool = False, touch: bool = True) -> webdriver.Chrome:
+        """
+        touch=False — фоновое обращение (наблюдатель), которое не продлевает жизнь простаивающего браузера.
+        """
+        with self.lock:
+            if touch:
+                self.last_used = time.monotonic()
             if self.driver:
                 try:
                     current_url = self.driver.current_url
                 except WebDriverException as e:
                     logger.warning("Driver не доступен для аккаунта %s: %s", self.account, str(e))
-                    if create_if_missing:
-                        self.driver = None
-                    else:
+                    if not create_if_missing:
                         raise Exception("Браузер закрыт. Используйте /open для запуска браузера.")
+                    self._shutdown_driver()
+                    return self._start_driver()
                 if "web.whatsapp.com" not in current_url:
                     raise Exception("Браузер не находится на странице WhatsApp Web. Используйте /open для открытия страницы.")
                 return self.driver
             else:
                 if create_if_missing:
-                    self.driver = self.create_driver()
-                    return self.driver
+                    return self._start_driver()
+                elif self.suspended:
+                    # Браузер был закрыт из-за простоя: профиль с входом сохранён, запускаем заново
+                    logger.info("Аккаунт %s: восстановление браузера после простоя", self.account)
+                    driver = self._start_driver()
+                    driver.get("https://web.whatsapp.com/")
+                    WebDriverWait(driver, MAX_BROWSER_WAIT).until(
+                        EC.presence_of_element_located((By.XPATH, SELECTOR_CONSTANTS["chat_list_xpath"])))
+                    self._start_observer()
+                    return driver
                 else:
                     raise Exception("Браузер не запущен. Используйте /open для его запуска.")
 
     def open_browser_and_login(self) -> dict:
-        driver = self.get_driver(create_if_missing=True)
-        driver.get("https://web.whatsapp.com/")
+        start = time.perf_counter()
+        with self.lock:
+            warm = self.driver is not None
+            driver = self.get_driver(create_if_missing=True)
+        # В заранее запущенном браузере WhatsApp Web уже открыт — повторная загрузка не нужна
+        if "web.whatsapp.com" not in driver.current_url:
+            driver.get("https://web.whatsapp.com/")
+        self.startup_timings["open"] = time.perf_counter() - start
+        self.startup_timings["warm"] = warm
+        logger.info("Аккаунт %s: браузер готов за %.2f сек (%s запуск)", self.account,
+                    self.startup_timings["open"], "тёплый" if warm else "холодный")
         start_time = time.time()
 
         while True:
@@ -88,7 +177,8 @@ class WhatsAppSession:
             if chat_elements:
                 with open(self.cookies_file, "wb") as f:
                     pickle.dump(driver.get_cookies(), f)
-                return {"message": f"Аккаунт '{self.account}': вход выполнен"}
+                self._start_observer()
+                return {"message": f"Аккаунт '{self.account}': вход выполнен", "startup": dict(self.startup_timings)}
 
             # Получение QR-кода с canvas
             qr_canvas = driver.find_elements(By.CSS_SELECTOR, "canvas[aria-label='Scan this QR code to link a device!']")
@@ -314,6 +404,7 @@ class WhatsAppSession:
         new_messages = {}
         download_dir = self.download_dir
         os.makedirs(download_dir, exist_ok=True)
+        downloads = self.get_download_watcher()
 
         # Глобальный таймаут на выполнение всего метода (например, 3 минуты)
         global_timeout = 180  # секунд
@@ -368,9 +459,10 @@ class WhatsAppSession:
             anchor = None
             anchor_attempts = 0
             max_anchor_attempts = 3
+            anchor_wait = WebDriverWait(driver, WA_UNREAD_ANCHOR_TIMEOUT)
             while anchor_attempts < max_anchor_attempts and anchor is None:
                 try:
-                    anchor = wait.until(
+                    anchor = anchor_wait.until(
                         EC.presence_of_element_located((By.XPATH, "//span[contains(text(), 'непрочит')]"))
                     )
                 except Exception:
@@ -382,11 +474,11 @@ class WhatsAppSession:
                 except Exception:
                     message_rows = []
             else:
-                # Если якоря нет, пытаемся получить все сообщения
+                # Если якоря нет, берём только последние входящие; старые отсеет курсор чата
                 try:
-                    message_rows = wait.until(
-                        EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'message-in')]"))
-                    )
+                    message_rows = wait.until(EC.presence_of_all_elements_located(
+                        (By.XPATH, f"({SELECTOR_CONSTANTS['message_in_xpath']})[position() > last() - {WA_FALLBACK_MAX_ROWS}]")
+                    ))
                 except Exception:
                     message_rows = []
 
@@ -398,44 +490,67 @@ class WhatsAppSession:
                     pass
                 continue
 
-            for row in message_rows:
+            # Поля всех строк разбираются одним execute_script, по строке обращаемся к драйверу только для скачивания
+            try:
+                parsed_rows = extract_rows(driver, message_rows)
+            except Exception as e:
+                logger.warning("Не удалось разобрать сообщения чата %s: %s", chat_title, e)
+                parsed_rows = []
+
+            # Обрабатываются только строки новее курсора чата (время и id последнего обработанного сообщения)
+            cursor = message_store.get_cursor(self.account, chat_title)
+            known_ids = message_store.known_ids(self.account, chat_title, [parsed["id"] for parsed in parsed_rows])
+            fresh_rows = rows_after_cursor(parsed_rows, cursor, known_ids)
+            if len(fresh_rows) < len(parsed_rows):
+                logger.info("Чат %s: пропущено уже обработанных сообщений: %d", chat_title,
+                            len(parsed_rows) - len(fresh_rows))
+            last_processed = None
+
+            # Изображения и голосовые всех новых строк читаются из blob: в странице одним вызовом
+            prefetched = {}
+            media_rows = [index for index in fresh_rows if parsed_rows[index]["kind"] in ("image", "audio")]
+            if WA_BLOB_FETCH and media_rows:
+                try:
+                    prefetched = dict(zip(media_rows, fetch_row_media(driver, [message_rows[i] for i in media_rows])))
+                except Exception as e:
+                    logger.warning("Чат %s: не удалось прочитать медиа из страницы: %s", chat_title, e)
+
+            for index in fresh_rows:
+                row, parsed = message_rows[index], parsed_rows[index]
                 # Проверка глобального таймаута
                 if time.time() - method_start_time > global_timeout:
                     break
+                last_processed = parsed
 
-                # Определяем отправителя
-                sender = "Unknown"
-                try:
-                    meta_elem = row.find_element(By.XPATH, ".//div[@data-pre-plain-text]")
-                    meta = meta_elem.get_attribute("data-pre-plain-text")
-                    meta_parts = meta.split("]")
-                    if len(meta_parts) > 1:
-                        meta_text = meta_parts[1].strip().rstrip(":")
-                        if "," in meta_text:
-                            sender_candidate = meta_text.split(",", 1)[1].strip()
-                        else:
-                            sender_candidate = meta_text
-                        if sender_candidate:
-                            sender = sender_candidate
-                except Exception:
-                    try:
-                        sender_elem = row.find_element(By.XPATH, ".//span[@aria-label]")
-                        sender_val = sender_elem.get_attribute("aria-label")
-                        if sender_val:
-                            sender = sender_val.rstrip(":").strip()
-                    except Exception:
-                        sender = "Unknown"
+                sender = parse_sender(parsed)
 
+                # Время из самого сообщения; если формат не распознан — время получения
+                meta = parse_pre_plain_text(parsed["meta"])
                 now = datetime.now() + timedelta(seconds=1)
-                time_str = now.strftime("%H:%M:%S")
-                date_str = now.strftime("%Y-%m-%d")
+                time_str = meta.get("time") or now.strftime("%H:%M:%S")
+                date_str = meta.get("date") or now.strftime("%Y-%m-%d")
+
+                # 1-3. Медиа, прочитанное из страницы, сохраняется сразу, без контекстного меню и ожидания загрузки
+                media = prefetched.get(index, {})
+                if media.get("content") is not None:
+                    default_ext = ".ogg" if parsed["kind"] == "audio" else ".png"
+                    saved = self._save_media(chat_title, parsed["id"], content=media["content"],
+                                             ext=media_extension(media["mime"], default_ext))
+                    new_messages[chat_title].append({
+                        "type": parsed["kind"],
+                        "id": parsed["id"],
+                        "sender": sender,
+                        "time": time_str,
+                        "date": date_str,
+                        **saved
+                    })
+                    continue
 
                 # 1. Обработка голосового сообщения
-                audio_buttons = row.find_elements(By.XPATH, ".//button[@aria-label='Воспроизвести голосовое сообщение']")
-                if audio_buttons:
+                if parsed["kind"] == "audio":
+                    download = downloads.expect()
                     try:
-                        existing_files = set(os.listdir(download_dir))
-                        audio_button = audio_buttons[0]
+                        audio_button = row.find_element(By.XPATH, SELECTOR_CONSTANTS["audio_button_xpath"])
                         actions = ActionChains(driver)
                         actions.move_to_element(audio_button).perform()
                         time.sleep(0.5)
@@ -451,91 +566,79 @@ class WhatsAppSession:
                         )
                         download_option.click()
 
-                        new_file = wait_for_new_file(download_dir, existing_files, timeout_sec=DOWNLOAD_TIMEOUT)
+                        new_file = downloads.wait(download, DOWNLOAD_TIMEOUT)
                         if not new_file:
                             raise Exception("Download timed out for audio message")
-                        unique_name = get_unique_filename("audio", "audio.ogg", ".ogg")
-                        os.rename(os.path.join(download_dir, new_file),
-                                os.path.join(download_dir, unique_name))
+                        saved = self._save_media(chat_title, parsed["id"],
+                                                 source_path=os.path.join(download_dir, new_file), ext=".ogg")
                         msg = {
                             "type": "audio",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
-                            "file_name": unique_name,
-                            "file_path": os.path.join(download_dir, unique_name)
+                            **saved
                         }
                         new_messages[chat_title].append(msg)
                     except Exception as audio_err:
                         new_messages[chat_title].append({
                             "type": "audio",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
                             "message": f"[Ошибка скачивания голосового сообщения: {audio_err}]"
                         })
+                    finally:
+                        downloads.discard(download)
                     continue
 
                 # 2. Обработка файлового сообщения
-                file_download_buttons = row.find_elements(By.XPATH, ".//div[@role='button'][contains(@title, 'Скачать')]")
-                if file_download_buttons:
+                if parsed["kind"] == "file":
+                    download = None
                     try:
-                        download_button = file_download_buttons[0]
-                        title_attr = download_button.get_attribute("title")
-                        match = re.search(r'Скачать\s+"(.+)"', title_attr)
+                        match = re.search(r'Скачать\s+"(.+)"', parsed["download_title"] or "")
                         original_file_name = match.group(1) if match else "unknown_file"
+                        file_type = parsed["file_type"] or "unknown"
+                        file_size = parsed["file_size"] or "unknown"
 
-                        try:
-                            file_type_elem = row.find_element(By.XPATH, ".//span[@data-meta-key='type']")
-                            file_type = file_type_elem.get_attribute("title") or file_type_elem.text
-                        except Exception:
-                            file_type = "unknown"
-                        try:
-                            size_elem = row.find_element(By.XPATH, ".//span[contains(text(), 'КБ') or contains(text(), 'МБ') or contains(text(), 'ГБ')]")
-                            file_size = size_elem.text
-                        except Exception:
-                            file_size = "unknown"
-
+                        download = downloads.expect(original_file_name)
+                        download_button = row.find_element(By.XPATH, SELECTOR_CONSTANTS["file_download_button_xpath"])
                         download_button.click()
-                        file_path = os.path.join(download_dir, original_file_name)
-                        timeout_limit = time.time() + DOWNLOAD_TIMEOUT
-                        while time.time() < timeout_limit:
-                            if os.path.exists(file_path):
-                                if not any(fname.startswith(original_file_name) and fname.endswith(".crdownload")
-                                        for fname in os.listdir(download_dir)):
-                                    break
-                            time.sleep(0.5)
-                        if not os.path.exists(file_path):
+                        new_file = downloads.wait(download, DOWNLOAD_TIMEOUT)
+                        if not new_file:
                             raise Exception("Download timed out for file: " + original_file_name)
-                        unique_name = get_unique_filename("file", original_file_name, os.path.splitext(original_file_name)[1] or "")
-                        os.rename(file_path, os.path.join(download_dir, unique_name))
-                        file_path = os.path.join(download_dir, unique_name)
+                        saved = self._save_media(chat_title, parsed["id"], source_path=os.path.join(download_dir, new_file),
+                                                 ext=os.path.splitext(original_file_name)[1], original_name=original_file_name)
                         new_messages[chat_title].append({
                             "type": "file",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
-                            "file_name": unique_name,
+                            "original_name": original_file_name,
                             "file_type": file_type,
                             "file_size": file_size,
-                            "file_path": file_path
+                            **saved
                         })
                     except Exception as e:
                         new_messages[chat_title].append({
                             "type": "file",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
                             "message": f"[Ошибка скачивания файла: {e}]"
                         })
+                    finally:
+                        downloads.discard(download)
                     continue
 
                 # 3. Обработка сообщения с изображением
-                image_elements = row.find_elements(By.XPATH, ".//img[contains(@src, 'blob:')]")
-                if image_elements:
+                if parsed["kind"] == "image":
+                    download = downloads.expect()
                     try:
-                        existing_files = set(os.listdir(download_dir))
-                        img_element = image_elements[0]
+                        img_element = row.find_element(By.XPATH, SELECTOR_CONSTANTS["image_xpath"])
                         actions = ActionChains(driver)
                         actions.move_to_element(img_element).perform()
                         time.sleep(0.5)
@@ -549,40 +652,38 @@ class WhatsAppSession:
                         )
                         download_option.click()
 
-                        new_file = wait_for_new_file(download_dir, existing_files, timeout_sec=DOWNLOAD_TIMEOUT)
+                        new_file = downloads.wait(download, DOWNLOAD_TIMEOUT)
                         if not new_file:
                             raise Exception("Download timed out for image message")
-                        unique_name = get_unique_filename("image", "image.png", ".png")
-                        os.rename(os.path.join(download_dir, new_file),
-                                os.path.join(download_dir, unique_name))
-                        file_path = os.path.join(download_dir, unique_name)
+                        saved = self._save_media(chat_title, parsed["id"], source_path=os.path.join(download_dir, new_file),
+                                                 ext=os.path.splitext(new_file)[1] or ".png")
                         new_messages[chat_title].append({
                             "type": "image",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
-                            "file_name": unique_name,
-                            "file_path": file_path
+                            **saved
                         })
                     except Exception as e:
                         new_messages[chat_title].append({
                             "type": "image",
+                            "id": parsed["id"],
                             "sender": sender,
                             "time": time_str,
                             "date": date_str,
                             "message": f"[Ошибка скачивания изображения: {e}]"
                         })
+                    finally:
+                        downloads.discard(download)
                     continue
 
                 # 4. Обработка текстового сообщения
-                try:
-                    text_elem = row.find_element(By.XPATH, ".//span[contains(@class, 'selectable-text')]")
-                    text = text_elem.text.strip()
-                except Exception:
-                    text = ""
+                text = parsed["text"]
                 if text:
                     new_messages[chat_title].append({
                         "type": "text",
+                        "id": parsed["id"],
                         "sender": sender,
                         "time": time_str,
                         "date": date_str,
@@ -594,8 +695,174 @@ class WhatsAppSession:
             except Exception:
                 pass
 
+            # Сообщения чата сохраняются одной транзакцией сразу после его обработки
+            self._store_messages({chat_title: new_messages[chat_title]})
+            if last_processed:
+                message_store.set_cursor(self.account, chat_title, row_timestamp(last_processed), last_processed["id"])
+
         return new_messages
 
+    def _save_media(self, chat: str, message_id: str, content: bytes = None, source_path: str = None,
+                    ext: str = "", original_name: str = None) -> dict:
+        """
+        Кладёт медиа (байты или загруженный файл) в хранилище аккаунта и связывает его с сообщением.
+        Одинаковое содержимое хранится один раз.
+        """
+        media = self.get_media_store()
+        if content is not None:
+            digest, file_path = media.put_bytes(content, ext)
+        else:
+            digest, file_path = media.put_file(source_path, ext)
+        media.link(chat, message_id, digest, original_name)
+        return {"file_name": os.path.basename(file_path), "file_path": file_path, "sha256": digest}
+
+    def _store_messages(self, messages: dict, observed: bool = False):
+        try:
+            saved = message_store.add_many(self.account, messages, observed=observed)
+            if saved:
+                logger.info("Аккаунт %s: сохранено новых сообщений: %d", self.account, saved)
+        except Exception as e:
+            logger.error("Аккаунт %s: не удалось сохранить сообщения: %s", self.account, e)
+
+    def get_chats(self) -> dict:
+        """
+        Список чатов из боковой панели одним execute_script.
+        """
+        driver = self.get_driver(create_if_missing=False)
+        WebDriverWait(driver, MAX_BROWSER_WAIT).until(
+            EC.presence_of_element_located((By.XPATH, SELECTOR_CONSTANTS["chat_list_xpath"])))
+        titles = driver.execute_script("""
+            var list = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            var items = document.evaluate(arguments[1], list, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var titles = [];
+            for (var i = 0; i < items.snapshotLength; i++) {
+                var title = items.snapshotItem(i).querySelector('span[dir="auto"][title]');
+                if (title && title.getAttribute('title')) { titles.push(title.getAttribute('title')); }
+            }
+            return titles;
+        """, SELECTOR_CONSTANTS["chat_list_xpath"], SELECTOR_CONSTANTS["chat_item_xpath"])
+        return {"chats": [{"chat": title} for title in titles]}
+
+    def _start_observer(self):
+        """
+        Запускает фоновое чтение буфера наблюдателя после входа: сообщения сразу сохраняются
+        в message_store и копятся до вызова get_observed_messages.
+        """
+        try:
+            if self.observer is None:
+                self.observer = MessageObserver(self)
+            self.observer.start(self._on_observed)
+        except Exception as e:
+            logger.warning("Аккаунт %s: не удалось запустить наблюдатель: %s", self.account, e)
+
+    def _on_observed(self, result: dict):
+        # Без медиа и курсора: такие записи не мешают обходу непрочитанных обработать сообщения полностью
+        self._store_messages(result["messages"], observed=True)
+        with self._observed_lock:
+            for chat, messages in result["messages"].items():
+                self._observed.extend((chat, message) for message in messages)
+            self._observed_unread.update(result["unread_chats"])
+
+    def get_observed_messages(self) -> dict:
+        """
+        Новые сообщения, собранные наблюдателем в странице с прошлого вызова.
+        Если наблюдатель ещё не установлен, он устанавливается, уже отрисованные сообщения не возвращаются.
+        """
+        with self.lock:
+            self.get_driver(create_if_missing=False)
+            if self.observer is None:
+                self.observer = MessageObserver(self)
+                self.observer.install()
+            self._on_observed(self.observer.drain())
+        with self._observed_lock:
+            observed, self._observed = list(self._observed), deque(maxlen=WA_OBSERVER_BUFFER_LIMIT)
+            unread_chats, self._observed_unread = self._observed_unread, {}
+        messages = {}
+        for chat, message in observed:
+            messages.setdefault(chat, []).append(message)
+        return {"messages": messages, "unread_chats": unread_chats}
+
+    def _start_driver(self) -> webdriver.Chrome:
+        """
+        Запускает браузер, заняв место в пуле (или дождавшись его).
+        """
+        WhatsAppManager.acquire_slot(self)
+        try:
+            self.driver = self.create_driver()
+        except Exception:
+            WhatsAppManager.release_slot(self)
+            raise
+        self.suspended = False
+        return self.driver
+
+    def _shutdown_driver(self):
+        """
+        Останавливает браузер и связанные с ним фоновые потоки и освобождает место в пуле.
+        """
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+        if self.download_watcher:
+            self.download_watcher.close()
+            self.download_watcher = None
+        if self.media_store:
+            self.media_store.close()
+            self.media_store = None
+        try:
+            if self.driver:
+                self.driver.quit()
+        finally:
+            self.driver = None
+            WhatsAppManager.release_slot(self)
+
+    def suspend(self, min_idle: float = 0) -> bool:
+        """
+        Закрывает простаивающий браузер, сохранив cookies; профиль Chrome остаётся на диске,
+        поэтому при следующем обращении вход не потребуется. Возвращает False, если сессия занята
+        или использовалась позже, чем min_idle секунд назад.
+        """
+        if self.commands.busy() or not self.lock.acquire(blocking=False):
+            return False
+        try:
+            if not self.driver or time.monotonic() - self.last_used < min_idle:
+                return False
+            try:
+                with open(self.cookies_file, "wb") as f:
+                    pickle.dump(self.driver.get_cookies(), f)
+            except Exception as e:
+                logger.warning("Аккаунт %s: не удалось сохранить cookies перед закрытием: %s", self.account, e)
+            try:
+                self._shutdown_driver()
+            except Exception as e:
+                logger.warning("Аккаунт %s: ошибка при закрытии простаивающего браузера: %s", self.account, e)
+            self.suspended = True
+            logger.info("Аккаунт %s: браузер закрыт из-за простоя", self.account)
+            return True
+        finally:
+            self.lock.release()
+
+    def stats(self) -> dict:
+        """
+        Состояние сессии и ресурсы дерева процессов chromedriver/Chrome.
+        """
+        driver = self.driver
+        stats = {
+            "account": self.account,
+            "live": driver is not None,
+            "suspended": self.suspended,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "queue": self.commands.stats(),
+        }
+        if driver:
+            process = getattr(driver.service, "process", None)
+            tree = process_tree_stats(process.pid if process else None)
+            stats.update({
+                "rss_mb": round(tree["rss_bytes"] / 1024 / 1024, 1),
+                "cpu_seconds": round(tree["cpu_seconds"], 1),
+                "processes": tree["processes"],
+            })
+        return stats
+
     def close_driver(self) -> dict:
         """
         Закрывает браузер для текущей сессии.
@@ -603,8 +870,7 @@ class WhatsAppSession:
         with self.lock:
             if self.driver:
                 try:
-                    self.driver.quit()
-                    self.driver = None
+                    self._shutdown_driver()
                     return {"message": f"Браузер для аккаунта '{self.account}' закрыт."}
                 except Exception as e:
                     logger.exception("Ошибка при закрытии драйвера: %s", e)
@@ -637,21 +903,143 @@ class WhatsAppSession:
 class WhatsAppManager:
     _sessions = {}
     _lock = threading.RLock()
+    # Ожидание свободного места в пуле браузеров
+    _slots = threading.Condition(_lock)
+    _waiting = 0
+    _reaper = None
 
     @classmethod
     def get_session(cls, account: str) -> WhatsAppSession:
         with cls._lock:
             if account not in cls._sessions:
                 cls._sessions[account] = WhatsAppSession(account)
+            if cls._reaper is None:
+                cls._reaper = threading.Thread(target=cls._reap_idle, daemon=True, name="whatsapp-idle-reaper")
+                cls._reaper.start()
             return cls._sessions[account]
 
+    @classmethod
+    def acquire_slot(cls, session: WhatsAppSession, timeout: float = WA_DRIVER_QUEUE_TIMEOUT):
+        """
+        Занимает место для нового браузера. Если все WA_MAX_LIVE_DRIVERS заняты, закрывает
+        самый давно использованный простаивающий браузер, а если таких нет — ждёт в очереди.
+        """
+        deadline = time.monotonic() + timeout
+        refused = set()             # Сессии, которые оказались заняты при попытке закрыть их браузер
+        with cls._slots:
+            cls._waiting += 1
+        try:
+            while True:
+                with cls._slots:
+                    if session.has_slot:
+                        return
+                    if sum(1 for s in cls._sessions.values() if s.has_slot) < WA_MAX_LIVE_DRIVERS:
+                        session.has_slot = True
+                        return
+                    victim = min(
+                        (s for s in cls._sessions.values()
+                         if s.has_slot and s.driver and s not in refused
+                         and time.monotonic() - s.last_used >= WA_EVICT_MIN_IDLE),
+                        key=lambda s: s.last_used, default=None)
+                    if victim is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise Exception(f"Все {WA_MAX_LIVE_DRIVERS} браузеров заняты, попробуйте позже.")
+                        logger.info("Аккаунт %s ждёт свободного браузера (в очереди: %d)",
+                                    session.account, cls._waiting)
+                        cls._slots.wait(min(remaining, WA_EVICT_MIN_IDLE))
+                        refused.clear()
+                        continue
+                # Браузер закрывается вне общей блокировки, чтобы не задерживать остальные аккаунты;
+                # suspend() сам проверяет, что сессия всё ещё простаивает, место затем проверяется заново
+                if not victim.suspend(min_idle=WA_EVICT_MIN_IDLE):
+                    refused.add(victim)
+        finally:
+            with cls._slots:
+                cls._waiting -= 1
+
+    @classmethod
+    def release_slot(cls, session: WhatsAppSession):
+        with cls._slots:
+            if session.has_slot:
+                session.has_slot = False
+                cls._slots.notify()
+
+    @classmethod
+    def _reap_idle(cls):
+        while True:
+            time.sleep(min(60, WA_SESSION_IDLE_TIMEOUT))
+            with cls._lock:
+                sessions = list(cls._sessions.values())
+            for session in sessions:
+                if session.driver and time.monotonic() - session.last_used > WA_SESSION_IDLE_TIMEOUT:
+                    session.suspend(min_idle=WA_SESSION_IDLE_TIMEOUT)
+
+    @classmethod
+    def fleet_stats(cls) -> dict:
+        with cls._lock:
+            sessions = list(cls._sessions.values())
+            waiting = cls._waiting
+        stats = [session.stats() for session in sessions]
+        return {
+            "max_live_drivers": WA_MAX_LIVE_DRIVERS,
+            "live_drivers": sum(1 for item in stats if item["live"]),
+            "waiting": waiting,
+            "queued_commands": sum(item["queue"]["depth"] for item in stats),
+            "sessions": stats,
+        }
+
+    @classmethod
+    def prewarm(cls, accounts: list = None) -> dict:
+        """
+        Запускает Chrome для аккаунтов (по умолчанию WA_PREWARM_ACCOUNTS) параллельно.
+        Возвращает замеры времени запуска по аккаунтам; ошибки не прерывают остальные запуски.
+        """
+        accounts = WA_PREWARM_ACCOUNTS if accounts is None else accounts
+        results = {}
+
+        def warm(account):
+            try:
+                session = cls.get_session(account)
+                results[account] = session.commands.submit(WA_PRIORITY_BULK, session.prewarm).result()
+            except Exception as e:
+                logger.error("Не удалось заранее запустить Chrome для аккаунта %s: %s", account, e)
+                results[account] = {"error": str(e)}
+
+        threads = [threading.Thread(target=warm, args=(account,), daemon=True) for account in accounts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
     @classmethod
     def close_session(cls, account: str) -> dict:
+        # Браузер закрывается вне общей блокировки, чтобы не задерживать другие аккаунты
         with cls._lock:
-            if account in cls._sessions:
-                result = cls._sessions[account].close_driver()
-                del cls._sessions[account]
-                return result
-            else:
-                raise Exception(f"Сессия для аккаунта '{account}' не найдена.")
+            session = cls._sessions.get(account)
+        if session is None:
+            raise Exception(f"Сессия для аккаунта '{account}' не найдена.")
+        # Ожидающие команды отклоняются, выполняющаяся доводится до конца
+        session.commands.close()
+        try:
+            with session.lock:
+                if session.driver:
+                    return session.close_driver()
+                # Браузер уже закрыт из-за простоя или не запускался
+                cls.release_slot(session)
+                return {"message": f"Браузер для аккаунта '{account}' закрыт."}
+        finally:
+            # Сессия убирается только после освобождения места, чтобы пул не недосчитался живых браузеров
+            with cls._lock:
+                if cls._sessions.get(account) is session:
+                    del cls._sessions[account]
+
+    @classmethod
+    async def run(cls, account: str, priority: int, method: str, *args):
+        """
+        Выполняет метод сессии аккаунта в её очереди команд и ожидает результат, не блокируя цикл событий.
+        """
+        session = cls.get_session(account)
+        return await session.commands.run(priority, getattr(session, method), *args)
 